@@ -5,9 +5,44 @@ PrefGen:
 Dataset Generator with Simple Preferences for StreamPref DSMS Prototype
 '''
 
+import array
+import bisect
+import bz2
+import cStringIO
 import csv
+import errno
+import fcntl
+import gzip
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
 import os
 import random
+import re
+import resource
+import select
+import shlex
+import shutil
+import signal
+import socket
+import SocketServer
+import sqlite3
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from distutils.spawn import find_executable
+
+# NumPy is optional (used for vectorized generation of tuples)
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 # Experiment parameters
@@ -19,18 +54,81 @@ RUL = 'rul'
 LEV = 'lev'
 IND = 'ind'
 TOP = 'top'
+SEL = 'sel'
+DIS = 'dis'
+ARI = 'ari'
 ALGORITHM = 'algorithm'
 
+# List of experiment parameters
+PARAMETER_LIST = [ATT, TUP, DEL, INS, RUL, LEV, IND, TOP, SEL, DIS, ARI]
+
+# Value distributions of attributes
+# Independent uniform values
+UNIFORM = 'uniform'
+# Independent Zipf values (value 0 is the most frequent)
+ZIPF = 'zipf'
+# Gaussian clusters
+CLUSTERED = 'clustered'
+# Values of a tuple close to each other (tuples near the diagonal)
+CORRELATED = 'correlated'
+# High value in some attributes implies low values in others
+# (tuples near the plane where the sum of values is constant)
+ANTICORRELATED = 'anticorrelated'
+
+# Experiment plan fields
+PLAN_DEFAULT = 'default'
+PLAN_SWEEPS = 'sweeps'
+SWEEP_TYPE = 'type'
+SWEEP_PARAMETERS = 'parameters'
+SWEEP_VARIANTS = 'variants'
+SWEEP_SAMPLES = 'samples'
+SWEEP_SEED = 'seed'
+
+# Sweep types
+# One-factor-at-a-time (one parameter varies, others are default)
+OFAT = 'ofat'
+# Full grid (cartesian product of all parameter values)
+GRID = 'grid'
+# Random sampling over the grid
+RANDOM = 'random'
+
 # Result fields
 RUNTIME = 'runtime'
 MEMORY = 'memory'
 FIRST = 'first'
 OTHERS = 'others'
+# Steady state fields (iterations trimmed as warm-up, average runtime,
+# iterations per second and percentiles of runtime after warm-up)
+WARMUP = 'warmup'
+STEADY = 'steady'
+THROUGHPUT = 'throughput'
 
 # System attributes for StremPref tables
 TS_ATT = '_TS'
 OP_ATT = '_FL'
 
+# Table formats (also used as file extensions)
+# Plain CSV
+CSV = 'csv'
+# CSV compressed with gzip
+CSV_GZ = 'csv.gz'
+# CSV compressed with bzip2
+CSV_BZ2 = 'csv.bz2'
+# Binary columnar format: a header followed by the columns _TS, _FL
+# (+1 for insertion and -1 for deletion) and A1..An as little-endian
+# 32-bit integer arrays
+BINARY = 'bin'
+# List of table formats
+FORMAT_LIST = [CSV, CSV_GZ, CSV_BZ2, BINARY]
+# Table format for generated tables
+TABLE_FORMAT = CSV
+# Header of binary tables (magic, version, attributes number, rows number)
+BINARY_HEADER = struct.Struct('<8sIIQ8x')
+BINARY_MAGIC = 'PREFCOL1'
+BINARY_VERSION = 1
+# Compression level for compressed formats
+COMPRESS_LEVEL = 6
+
 # Parameter values related to generation of table data
 # Max value for attributes
 MAX_VALUE = 63
@@ -56,10 +154,52 @@ INSERTION_DEFAULT = 50
 TOPK_LIST = [-1, 125, 250, 500, 1000]
 # Default top-k
 TOPK_DEFAULT = -1
+# Selectivity: percentage of generated tuples matching the condition and
+# the preferred (BETTER/WORST) values of some preference rule
+# (0 for uniform values, tables are then independent of the rules)
+SELECTIVITY_LIST = [0, 10, 25, 50, 100]
+# Default selectivity
+SELECTIVITY_DEFAULT = 0
+# List of value distributions
+DISTRIBUTION_LIST = [UNIFORM, ZIPF, CLUSTERED, CORRELATED, ANTICORRELATED]
+# Default value distribution
+DISTRIBUTION_DEFAULT = UNIFORM
+# Exponent of Zipf distribution
+ZIPF_EXPONENT = 1.0
+# Number of clusters and standard deviation of clusters (fraction of the
+# value range) for clustered distribution
+CLUSTER_NUMBER = 4
+CLUSTER_DEVIATION = 0.05
+# Standard deviation (fraction of the value range) of values around the
+# diagonal/plane for correlated and anti-correlated distributions
+CORRELATION_DEVIATION = 0.05
 
 # Default iteration number
 ITERATION_DEFAULT = 100
 
+# Buffer size (in bytes) for table files
+FILE_BUFFER_SIZE = 1024 * 1024
+
+# Live tuples (kept to sample deletions) are packed as rows of integers
+# Type code of packed values (signed bytes if they hold MAX_VALUE)
+LIVE_TYPECODE = 'b' if MAX_VALUE < 128 else 'i'
+# Initial capacity (in tuples) of live tuples buffers
+LIVE_CAPACITY = 1024
+# Directory of memory-mapped files used to spill live tuples
+# (None to keep them in memory, requires NumPy)
+SPILL_DIR = None
+# Maximum number of initial tuples generated at once (tables with more
+# initial tuples are generated in chunks)
+GEN_CHUNK_SIZE = 10000
+
+# Base seed for random generation (each table has its own seed derived
+# from this value and the table ID)
+SEED = 0
+
+# Generator version (must be changed when generated data changes for the
+# same parameters, so existing files are regenerated)
+GENERATOR_VERSION = 1
+
 # Parameter values related to preference queries
 # List of rules number
 RULE_LIST = [2, 4, 8, 16, 32]
@@ -73,6 +213,10 @@ LEVEL_DEFAULT = 2
 INDIFF_LIST = [0, 1, 2, 4]
 # Default indifferent attributes
 INDIFF_DEFAULT = 4
+# List of condition arities (number of attributes in rule conditions)
+ARITY_LIST = [1, 2, 4, 8]
+# Default condition arity
+ARITY_DEFAULT = 2
 
 # List of algorithms
 ALGORITHM_LIST = ['inc_ancestors', 'inc_graph', 'inc_partition', 'partition']
@@ -80,8 +224,24 @@ ALGORITHM_LIST = ['inc_ancestors', 'inc_graph', 'inc_partition', 'partition']
 # Number of experiment runs
 RUN_COUNT = 5
 
+# Adaptive repetition: target relative half-width of confidence interval
+# (0 for a fixed number of runs) and minimum/maximum number of runs
+TARGET_CI = 0
+MIN_RUNS = 3
+MAX_RUNS = 20
+
 # Preference rules format
-RULE_STRING = 'IF A1 = {c1} AND A2 = {c2} THEN A3 = {b} BETTER A3 = {w} {i}'
+# (conditions are on attributes A1..An for arity n, the preferred attribute
+# is the next one and indifferent attributes follow it)
+RULE_STRING = 'IF {c} THEN A{a} = {b} BETTER A{a} = {w} {i}'
+RULE_CONDITION = 'A{a} = {v}'
+# Patterns to parse rules and top-k of queries (inverse of RULE_STRING,
+# RULE_CONDITION and QUERY)
+RULE_PATTERN = re.compile(r'IF (?P<cond>.+?) THEN A(?P<att>\d+) = (?P<b>\d+) '
+                          r'BETTER A(?P=att) = (?P<w>\d+)'
+                          r'(?: \[(?P<ind>[^\]]*)\])?')
+CONDITION_PATTERN = re.compile(r'A(\d+) = (\d+)')
+TOPK_PATTERN = re.compile(r'TOP\((\d+)\)')
 
 # Query
 QUERY = '''SELECT {t} * FROM r
@@ -95,683 +255,4846 @@ RUNTIME_SUMMARY_DIR = MAIN_DIR + os.sep + 'runtime_summary'
 MEMORY_SUMMARY_DIR = MAIN_DIR + os.sep + 'memory_summary'
 RUNTIME_RESULT_DIR = MAIN_DIR + os.sep + 'runtime_result'
 MEMORY_RESULT_DIR = MAIN_DIR + os.sep + 'memory_result'
+STEADY_SUMMARY_DIR = MAIN_DIR + os.sep + 'steady_summary'
+STEADY_RESULT_DIR = MAIN_DIR + os.sep + 'steady_result'
+WALL_SUMMARY_DIR = MAIN_DIR + os.sep + 'wall_summary'
+RSS_SUMMARY_DIR = MAIN_DIR + os.sep + 'rss_summary'
+WALL_RESULT_DIR = MAIN_DIR + os.sep + 'wall_result'
+RSS_RESULT_DIR = MAIN_DIR + os.sep + 'rss_result'
 QUERIES_DIR = MAIN_DIR + os.sep + 'queries'
 DATA_DIR = MAIN_DIR + os.sep + 'data'
 ENV_DIR = MAIN_DIR + os.sep + 'env'
+ORACLE_DIR = MAIN_DIR + os.sep + 'oracle'
+
+# Database of experiment results (loaded from detail files)
+RESULTS_DB = MAIN_DIR + os.sep + 'results.db'
+
+# Manifest of generated files
+MANIFEST_FILE = MAIN_DIR + os.sep + 'manifest.json'
+# Log of manifest entries recorded since the manifest was stored
+MANIFEST_LOG = MAIN_DIR + os.sep + 'manifest.log'
+
+# Benchmark results of PrefGen
+BENCH_FILE = MAIN_DIR + os.sep + 'bench.json'
+
+# Manifest fields
+INPUTS = 'inputs'
+CHECKSUM = 'checksum'
+SIZE = 'size'
+MTIME = 'mtime'
 
 # Directory list
 DIR_LIST = [MAIN_DIR, DETAILS_DIR, RUNTIME_SUMMARY_DIR, MEMORY_SUMMARY_DIR,
-            RUNTIME_RESULT_DIR, MEMORY_RESULT_DIR, QUERIES_DIR, DATA_DIR,
-            ENV_DIR]
+            RUNTIME_RESULT_DIR, MEMORY_RESULT_DIR, STEADY_SUMMARY_DIR,
+            STEADY_RESULT_DIR, WALL_SUMMARY_DIR, RSS_SUMMARY_DIR,
+            WALL_RESULT_DIR, RSS_RESULT_DIR, QUERIES_DIR, DATA_DIR, ENV_DIR,
+            ORACLE_DIR]
+
+# Suffix of resource files (replacing '.csv' of detail files)
+RESOURCE_SUFFIX = '.res.json'
+# Suffix of files being written by runs (renamed when runs succeed)
+TEMP_SUFFIX = '.part'
+# Suffix of lock files serializing the generation of files by workers
+LOCK_SUFFIX = '.lock'
+# Suffix of invalid detail files (moved away to be run again)
+INVALID_SUFFIX = '.invalid'
+# Journal of experiment runs (JSON lines)
+JOURNAL_FILE = MAIN_DIR + os.sep + 'journal.jsonl'
+# Lock file held (shared) by processes running experiments
+RUN_LOCK_FILE = MAIN_DIR + os.sep + 'run.lock'
+# Journal events
+RUN_START = 'start'
+RUN_SUCCESS = 'success'
+RUN_FAILURE = 'failure'
+RUN_LOST = 'lost'
+# Failed attempts before this event are not counted (no task)
+RUN_RESET = 'reset'
+
+# Resource fields
+WALL_TIME = 'wall_time'
+USER_TIME = 'user_time'
+SYS_TIME = 'sys_time'
+MAX_RSS = 'max_rss'
+VOLUNTARY_SWITCHES = 'voluntary_switches'
+INVOLUNTARY_SWITCHES = 'involuntary_switches'
+EXIT_STATUS = 'exit_status'
+TIMELINE = 'timeline'
+RESOURCE_FIELD_LIST = [WALL_TIME, USER_TIME, SYS_TIME, MAX_RSS,
+                       VOLUNTARY_SWITCHES, INVOLUNTARY_SWITCHES, EXIT_STATUS,
+                       TIMELINE]
 
 # Command for experiment run
 RUN_COMMAND = \
     "streampref -p {alg} -e " + ENV_DIR + os.sep + "{id}.env -d {det} -m {max}"
-# Command for calculation of confidence interval
-CONFINTERVAL_COMMAND = \
-    "confinterval.py -i {inf} -o {outf} -k {keyf}"
+# Command to pin a process to a core (used when os.sched_setaffinity is
+# not available)
+TASKSET_COMMAND = "taskset -c {core} "
+# Number of cores kept free (for the OS and the scheduler) on parallel runs
+RESERVED_CORES = 1
+# Interval (in seconds) to check running experiments
+POLL_INTERVAL = 0.1
+# Interval (in seconds) between samples of memory of running experiments
+SAMPLE_INTERVAL = 0.5
+# Wall-clock limit (in seconds) of a run (0 for no limit)
+RUN_TIMEOUT = 0
+# Resident memory limit (in MB) of a run (0 for no limit)
+MEMORY_LIMIT = 0
+# Maximum number of attempts of a run (failed runs are retried)
+MAX_ATTEMPTS = 3
+# Delay (in seconds) before retrying a failed run (doubled on every
+# failure)
+RETRY_DELAY = 10.0
+# Time (in seconds) after the last heartbeat of a worker to re-queue its
+# leased task
+LEASE_TIMEOUT = 30.0
+# Interval (in seconds) between heartbeats of workers
+HEARTBEAT_INTERVAL = 5.0
+# Interval (in seconds) between lease requests of idle workers
+WORKER_WAIT = 1.0
+# Time (in seconds) workers keep trying to reach the coordinator
+WORKER_RETRY = 60.0
+# Interval (in seconds) between reports of experiments monitor
+MONITOR_INTERVAL = 5.0
+# Relative deviation of average runtime from historical baseline to flag
+# a running experiment
+DRIFT_THRESHOLD = 0.5
+# Minimum number of iterations to check deviation from baseline
+DRIFT_MIN_ITERATIONS = 10
+# Percentiles reported for iterations
+PERCENTILE_LIST = [50, 95, 99]
+# Maximum fraction of iterations of a run trimmed as warm-up
+WARMUP_MAX_FRACTION = 0.5
+
+# Stream mode (--serve): rate (tuples per second, 0 for no limit),
+# maximum data (in bytes) waiting for the reader (generation pauses when
+# it is reached), size of writes and interval (in seconds) between reports
+SERVE_RATE = 10000
+SERVE_BUFFER_SIZE = 1024 * 1024
+SERVE_CHUNK_SIZE = 64 * 1024
+SERVE_REPORT_INTERVAL = 5.0
+
+# Benchmark sizes (lists of attributes, tuples and rules numbers and
+# number of instants)
+BENCH_SIZE_DICT = {'small': {ATT: [8], TUP: [1000], RUL: [1000],
+                             'instants': 100},
+                   'full': {ATT: [8, 64], TUP: [1000, 8000],
+                            RUL: [1000, 100000],
+                            'instants': ITERATION_DEFAULT}}
+# Default benchmark size
+BENCH_SIZE = 'small'
+# Repetitions of each benchmark (best time is used)
+BENCH_REPEAT = 3
+# Detail files loaded by summary benchmark
+BENCH_DETAIL_FILES = 20
+# Relative rate decrease (against baseline) reported as slowdown
+BENCH_THRESHOLD = 0.2
+
+# Confidence level of confidence intervals
+CONFIDENCE = 0.95
+# Suffix of fields with confidence interval (half-width) in result files
+CI_SUFFIX = '_ci'
+# Suffix of fields with standard deviation in result files
+STD_SUFFIX = '_std'
+# Number of bootstrap resamples for confidence intervals
+# (0 for Student's t confidence intervals)
+BOOTSTRAP_SAMPLES = 0
 
 
-def gen_insert_records(tup_number, att_number):
+def gen_insert_records(tup_number, att_number, distribution=UNIFORM):
     '''
-    Generate record to insert
+    Generate record to insert as a single integer matrix
+    (NumPy 2-D array if available, otherwise a row-major flat array)
+    with values drawn from a distribution of DISTRIBUTION_DICT
     '''
-    # List of records
-    rec_list = []
-    # Loop to count the tuples number
-    for _ in range(tup_number):
-        # new tuple record
-        new_record = {}
-        # List of attributes
-        att_list = ['A' + str(number + 1) for number in range(att_number)]
-        # Generate each attribute value
-        for att in att_list:
-            new_record[att] = random.randint(0, MAX_VALUE)
-        # Append record into list of records
-        rec_list.append(new_record)
-    # Return built record list
-    return rec_list
+    return get_distribution(distribution)(tup_number, att_number)
 
 
-def gen_delete_records(record_list, tup_number):
+def get_distribution(distribution):
     '''
-    Generate record to be deleted from a given list of records
+    Get sampler function of a value distribution
     '''
-    # Shuffle record list
-    random.shuffle(record_list)
-    # Copy last 'tup_number" records to deleted list
-    deleted_list = record_list[:tup_number]
-    # Delete copied records
-    del record_list[:tup_number]
-    return deleted_list
+    if distribution not in DISTRIBUTION_DICT:
+        raise ValueError('Invalid distribution: ' + str(distribution))
+    return DISTRIBUTION_DICT[distribution]
 
 
-def store_records(filename, record_list, att_number, timestamp, operation='+'):
+def scale_values(value_matrix):
     '''
-    Store a record list in file table using StremPref format
+    Convert a matrix of real values in [0, 1] (NumPy array or flat list)
+    into an integer matrix of values in [0, MAX_VALUE]
     '''
-    # Check if record list is empty
-    if not len(record_list):
-        return
-    # Build attribute list including timestamp and operation
-    att_list = [TS_ATT, OP_ATT] + \
-        ['A' + str(number + 1) for number in range(att_number)]
-    # Open file
-    out_file = open(filename, 'a')
-    out_write = csv.DictWriter(out_file, att_list)
-    # Write file header (if file is empty)
-    if out_file.tell() == 0:
-        out_write.writeheader()
-    # Write records to file
-    for rec in record_list:
-        # Copy to preserve original record in the list
-        copy_rec = rec.copy()
-        # Add attributes _FL ant _TS
-        copy_rec[TS_ATT] = timestamp
-        copy_rec[OP_ATT] = operation
-        out_write.writerow(copy_rec)
-    out_file.close()
+    if numpy is not None and isinstance(value_matrix, numpy.ndarray):
+        return numpy.clip(numpy.rint(value_matrix * MAX_VALUE),
+                          0, MAX_VALUE).astype(int)
+    return array.array('l', [min(max(int(round(value * MAX_VALUE)), 0),
+                                 MAX_VALUE)
+                             for value in value_matrix])
 
 
-def get_table_id(exp_conf):
+def sample_uniform(tup_number, att_number):
     '''
-    Return a table ID for given parameters
+    Sample independent uniform values
     '''
-    return ATT + str(exp_conf[ATT]) + \
-        TUP + str(exp_conf[TUP]) + \
-        DEL + str(exp_conf[DEL]) + \
-        INS + str(exp_conf[INS])
+    # Vectorized generation (same uniform distribution on [0, MAX_VALUE])
+    if numpy is not None:
+        return numpy.random.randint(0, MAX_VALUE + 1,
+                                    size=(tup_number, att_number))
+    # Fallback using stdlib array (int(random() * n) is the same
+    # computation made by random.randint for small ranges)
+    rand = random.random
+    span = MAX_VALUE + 1
+    return array.array('l', [int(rand() * span)
+                             for _ in xrange(tup_number * att_number)])
 
 
-def get_query_id(exp_conf):
+def get_zipf_cdf():
     '''
-    Return a query ID for given parameters
+    Get cumulative distribution of Zipf values (0 to MAX_VALUE)
     '''
-    operation = 'best'
-    if exp_conf[TOP] != -1:
-        operation = TOP + str(exp_conf[TOP])
-    return RUL + str(exp_conf[RUL]) + \
-        LEV + str(exp_conf[LEV]) + \
-        IND + str(exp_conf[IND]) + \
-        operation
+    weight_list = [1.0 / (rank ** ZIPF_EXPONENT)
+                   for rank in range(1, MAX_VALUE + 2)]
+    total = math.fsum(weight_list)
+    cdf_list = []
+    cumulative = 0.0
+    for weight in weight_list:
+        cumulative += weight
+        cdf_list.append(cumulative / total)
+    return cdf_list
 
 
-def get_experiment_id(exp_conf):
+def sample_zipf(tup_number, att_number):
     '''
-    Return the ID of an experiment
+    Sample independent Zipf values (inverse transform over the
+    cumulative distribution)
     '''
-    return get_table_id(exp_conf) + get_query_id(exp_conf)
+    cdf_list = get_zipf_cdf()
+    if numpy is not None:
+        index_array = numpy.searchsorted(
+            cdf_list, numpy.random.random_sample((tup_number, att_number)))
+        return numpy.minimum(index_array, MAX_VALUE)
+    rand = random.random
+    return array.array('l', [min(bisect.bisect_left(cdf_list, rand()),
+                                 MAX_VALUE)
+                             for _ in xrange(tup_number * att_number)])
 
 
-def gen_table(exp_conf):
+def get_cluster_centers(att_number):
     '''
-    Generate table
+    Get centers of clusters (values in [0, 1]). Centers are the same for
+    every table (own random generator seeded by SEED)
     '''
-    table_id = get_table_id(exp_conf)
-    filename = DATA_DIR + os.sep + table_id + '.csv'
-    if os.path.isfile(filename):
-        return
-    # Clear file
-    out_file = open(filename, 'w')
-    out_file.close()
-    # Generate initial list of tuples
-    current_list = gen_insert_records(exp_conf[TUP], exp_conf[ATT])
-    # Store initial list on file
-    store_records(filename, current_list, exp_conf[ATT], 0)
-    # Generate record for each iteration
-    for timestamp in range(1, ITERATION_DEFAULT):
-        delete_list = gen_delete_records(current_list, exp_conf[DEL])
-        store_records(filename, delete_list, exp_conf[ATT], timestamp,
-                      '-')
-        insert_list = gen_insert_records(exp_conf[INS],
-                                         exp_conf[ATT])
-        current_list += insert_list
-        store_records(filename, insert_list, exp_conf[ATT], timestamp)
+    rand = random.Random(SEED).random
+    return [[rand() for _ in range(att_number)]
+            for _ in range(CLUSTER_NUMBER)]
 
 
-def gen_all_tables(experiment_list):
+def sample_clustered(tup_number, att_number):
     '''
-    Generate all tables
+    Sample values from Gaussian clusters (each tuple belongs to a random
+    cluster)
     '''
-    for exp_rec in experiment_list:
-        gen_table(exp_rec)
+    center_list = get_cluster_centers(att_number)
+    if numpy is not None:
+        cluster_array = numpy.random.randint(0, CLUSTER_NUMBER,
+                                             size=tup_number)
+        return scale_values(
+            numpy.array(center_list)[cluster_array] +
+            numpy.random.normal(0, CLUSTER_DEVIATION,
+                                (tup_number, att_number)))
+    rand = random.random
+    gauss = random.gauss
+    value_list = []
+    for _ in xrange(tup_number):
+        center = center_list[int(rand() * CLUSTER_NUMBER)]
+        value_list.extend(value + gauss(0, CLUSTER_DEVIATION)
+                          for value in center)
+    return scale_values(value_list)
 
 
-def gen_rule(rule_dict):
+def sample_correlated(tup_number, att_number):
     '''
-    Convert rule dictionary into rule in string format
+    Sample correlated values: every attribute of a tuple deviates little
+    from a uniform value of the tuple
     '''
-    return RULE_STRING.format(c1=rule_dict['COND1'],
-                              c2=rule_dict['COND2'],
-                              b=rule_dict['BEST'],
-                              w=rule_dict['WORST'],
-                              i=rule_dict['INDIFF'])
+    if numpy is not None:
+        return scale_values(
+            numpy.random.random_sample((tup_number, 1)) +
+            numpy.random.normal(0, CORRELATION_DEVIATION,
+                                (tup_number, att_number)))
+    rand = random.random
+    gauss = random.gauss
+    value_list = []
+    for _ in xrange(tup_number):
+        base = rand()
+        value_list.extend(base + gauss(0, CORRELATION_DEVIATION)
+                          for _ in xrange(att_number))
+    return scale_values(value_list)
 
 
-def gen_rules(exp_conf):
+def sample_anticorrelated(tup_number, att_number):
     '''
-    Generate preference rules
+    Sample anti-correlated values: the average of the values of a tuple
+    deviates little from the middle of the range while the values spread
+    uniformly around it (summing to zero)
     '''
-    # Preference level
-    current_level = 0
-    # Values for attributes of rule condition
-    cond1 = 1
-    cond2 = 1
-    # Preferred value
-    pref_value = 1
-    # Indifferent attributes
-    indiff_list = []
-    # Build list of indifferent attributes
-    indiff_str = ''
-    if exp_conf[IND] > 0:
-        # Indifferent attributes start in A4
-        for att_cont in range(exp_conf[IND]):
-            indiff_list.append('A' + str(att_cont + 4))
-        indiff_str = '[' + ', '.join(indiff_list) + ']'
-    # Build rules list
-    rules_list = []
-    for _ in range(exp_conf[RUL]):
-        rule_dict = {}
-        rule_dict['COND1'] = cond1
-        rule_dict['COND2'] = cond2
-        rule_dict['BEST'] = pref_value
-        pref_value += 1
-        rule_dict['WORST'] = pref_value
-        current_level += 1
-        # Check if maximum level have been reached
-        if current_level == exp_conf[LEV]:
-            current_level = 0
-            pref_value = 1
-            cond2 += 1
-        # Check if maximum values have been reached
-        if cond2 > MAX_VALUE:
-            cond1 += 1
-            if cond1 > MAX_VALUE:
-                cond1 = 1
-            cond2 = 1
-        rule_dict['INDIFF'] = indiff_str
-        rules_list.append(gen_rule(rule_dict))
-    return rules_list
+    if numpy is not None:
+        spread_array = numpy.random.random_sample((tup_number, att_number))
+        spread_array -= spread_array.mean(axis=1)[:, numpy.newaxis]
+        return scale_values(
+            0.5 + numpy.random.normal(0, CORRELATION_DEVIATION,
+                                      (tup_number, 1)) + spread_array)
+    rand = random.random
+    gauss = random.gauss
+    value_list = []
+    for _ in xrange(tup_number):
+        base = 0.5 + gauss(0, CORRELATION_DEVIATION)
+        spread_list = [rand() for _ in xrange(att_number)]
+        mean = math.fsum(spread_list) / att_number
+        value_list.extend(base + spread - mean for spread in spread_list)
+    return scale_values(value_list)
 
 
-def gen_query(exp_conf):
+# Sampler functions of value distributions
+DISTRIBUTION_DICT = {UNIFORM: sample_uniform,
+                     ZIPF: sample_zipf,
+                     CLUSTERED: sample_clustered,
+                     CORRELATED: sample_correlated,
+                     ANTICORRELATED: sample_anticorrelated}
+
+
+def set_rule_matches(matrix, att_number, rule_index, selectivity):
     '''
-    Generate a preference query
+    Make a fraction (selectivity percentage) of the records of a matrix
+    match some preference rule: the condition attributes (A1..An for
+    arity n) receive the condition of a random entry of the rule index and
+    the next attribute one of its preferred values.
+    The random generators are only used if selectivity is not zero
     '''
-    query_id = get_query_id(exp_conf)
-    filename = QUERIES_DIR + os.sep + query_id + '.cql'
-    rules_list = gen_rules(exp_conf)
-    pref = '\nAND\n'.join(rules_list)
-    topk = ''
-    if exp_conf[TOP] != -1:
-        topk = 'TOP(' + str(exp_conf[TOP]) + ')'
-    query = QUERY.format(t=topk, p=pref)
-    out_file = open(filename, 'w')
-    out_file.write(query)
-    out_file.close()
+    if selectivity <= 0 or not rule_index:
+        return matrix
+    arity = len(rule_index[0]) - 2
+    if att_number <= arity:
+        raise ValueError('Selectivity requires at least ' +
+                         str(arity + 1) + ' attributes')
+    fraction = selectivity / 100.0
+    # Vectorized selection and assignment of matching records
+    if numpy is not None and isinstance(matrix, numpy.ndarray):
+        row_array = numpy.flatnonzero(
+            numpy.random.random_sample(len(matrix)) < fraction)
+        if len(row_array):
+            entry_array = numpy.random.randint(0, len(rule_index),
+                                               size=len(row_array))
+            value_array = numpy.array(rule_index,
+                                      dtype=matrix.dtype)[entry_array]
+            choice_array = numpy.random.randint(arity, arity + 2,
+                                                size=len(row_array))
+            for att in range(arity):
+                matrix[row_array, att] = value_array[:, att]
+            matrix[row_array, arity] = \
+                value_array[numpy.arange(len(row_array)), choice_array]
+        return matrix
+    # Fallback over the row-major flat array
+    rand = random.random
+    for pos in xrange(0, len(matrix), att_number):
+        if rand() < fraction:
+            entry = rule_index[int(rand() * len(rule_index))]
+            matrix[pos:pos + arity] = array.array('l', entry[:arity])
+            matrix[pos + arity] = \
+                entry[arity] if rand() < 0.5 else entry[arity + 1]
+    return matrix
 
 
-def gen_all_queries(experiment_list):
+def gen_stream_matrix(tup_number, att_number, rule_index=None,
+                      selectivity=0, distribution=UNIFORM):
     '''
-    Generate all queries
+    Generate records to insert as a single integer matrix
+    (values from distribution, matching preference rules according to
+    selectivity)
     '''
-    for exp_rec in experiment_list:
-        gen_query(exp_rec)
+    matrix = gen_insert_records(tup_number, att_number, distribution)
+    return set_rule_matches(matrix, att_number, rule_index, selectivity)
 
 
-def gen_env_file(exp_conf):
+def gen_stream_records(tup_number, att_number, rule_index=None,
+                       selectivity=0, distribution=UNIFORM):
     '''
-    Generate environment files for StremPref
+    Generate records to insert as a list of row tuples
     '''
-    table_id = get_table_id(exp_conf)
-    query_id = get_query_id(exp_conf)
-    att_list = ['a' + str(number + 1) + ' INTEGER'
-                for number in range(exp_conf[ATT])]
-    att_str = ', '.join(att_list)
-    text = "REGISTER TABLE r ({att}) \nINPUT '{ddir}/{tab}.csv';"\
-        .format(att=att_str, ddir=DATA_DIR, tab=table_id)
-    text += '\n\n' + '#' * 80 + '\n\n'
-    text += "REGISTER QUERY q \nINPUT '{qdir}/{que}.cql';"\
-        .format(qdir=QUERIES_DIR, que=query_id)
-    filename = table_id + query_id + '.env'
-    out_file = open(ENV_DIR + os.sep + filename, 'w')
-    out_file.write(text)
-    out_file.close()
+    return get_rows(gen_stream_matrix(tup_number, att_number, rule_index,
+                                      selectivity, distribution),
+                    att_number)
 
 
-def add_experiment(experiment_list, experiment):
+def gen_stream_chunks(tup_number, att_number, rule_index=None,
+                      selectivity=0, distribution=UNIFORM):
     '''
-    Add an experiment into experiment list
+    Generate records to insert as matrices of at most GEN_CHUNK_SIZE
+    records (a single matrix if tup_number is not greater)
     '''
-    if experiment not in experiment_list:
-        experiment_list.append(experiment.copy())
+    for start in xrange(0, tup_number, GEN_CHUNK_SIZE):
+        yield gen_stream_matrix(min(GEN_CHUNK_SIZE, tup_number - start),
+                                att_number, rule_index, selectivity,
+                                distribution)
 
 
-def gen_experiment_list():  # IGNORE:too-many-statements
+def get_rows(matrix, att_number):
     '''
-    Generate the list of experiments
+    Convert a matrix of records into a list of row tuples
     '''
-    exp_list = []
-    # Default parameters
-    def_rec = {ATT: ATTRIBUTE_DEFAULT, TUP: TUPLE_DEFAULT,
-               DEL: DELETION_DEFAULT, INS: INSERTION_DEFAULT,
-               RUL: RULE_DEFAULT, LEV: LEVEL_DEFAULT, IND: INDIFF_DEFAULT,
-               TOP: TOPK_DEFAULT}
-    # Attributes number variation (no deletions)
-    for att_number in ATTRIBUTE_LIST:
-        rec = def_rec.copy()
-        rec[ATT] = att_number
-        add_experiment(exp_list, rec)
-        rec[DEL] = 0
-        add_experiment(exp_list, rec)
-        rec[DEL] = DELETION_DEFAULT
-        rec[INS] = 0
-        add_experiment(exp_list, rec)
-
-    # Tuples number variation (no deletions)
-    for tup_number in TUPLE_LIST:
-        rec = def_rec.copy()
-        rec[TUP] = tup_number
-        add_experiment(exp_list, rec)
-        rec[DEL] = 0
-        add_experiment(exp_list, rec)
-        rec[DEL] = DELETION_DEFAULT
-        rec[INS] = 0
-        add_experiment(exp_list, rec)
-
-    # Deletions number variation (no insertions)
-    for deletions in DELETION_LIST:
-        rec = def_rec.copy()
-        rec[TUP] = TUPLE_MAX
-        rec[DEL] = deletions
-        add_experiment(exp_list, rec)
-        rec[INS] = 0
-        add_experiment(exp_list, rec)
-
-    # Insertions number variation (no deletions)
-    for insertions in INSERTION_LIST:
-        rec = def_rec.copy()
-        rec[INS] = insertions
-        add_experiment(exp_list, rec)
-        rec[DEL] = 0
-        add_experiment(exp_list, rec)
-
-    # Rules number variation
-    for rules_number in RULE_LIST:
-        rec = def_rec.copy()
-        rec[RUL] = rules_number
-        add_experiment(exp_list, rec)
-        rec[DEL] = 0
-        add_experiment(exp_list, rec)
-        rec[DEL] = DELETION_DEFAULT
-        rec[INS] = 0
-        add_experiment(exp_list, rec)
-
-    # Level variation
-    for level in LEVEL_LIST:
-        rec = def_rec.copy()
-        rec[LEV] = level
-        add_experiment(exp_list, rec)
-        rec[DEL] = 0
-        add_experiment(exp_list, rec)
-        rec[DEL] = DELETION_DEFAULT
-        rec[INS] = 0
-        add_experiment(exp_list, rec)
-
-    # indifferent attributes variation
-    for indif_number in INDIFF_LIST:
-        rec = def_rec.copy()
-        rec[IND] = indif_number
-        add_experiment(exp_list, rec)
-        rec[DEL] = 0
-        add_experiment(exp_list, rec)
-        rec[DEL] = DELETION_DEFAULT
-        rec[INS] = 0
-        add_experiment(exp_list, rec)
-
-    # indifferent attributes variation
-    for topk_number in TOPK_LIST:
-        rec = def_rec.copy()
-        rec[TOP] = topk_number
-        add_experiment(exp_list, rec)
-        rec[DEL] = 0
-        add_experiment(exp_list, rec)
-        rec[DEL] = DELETION_DEFAULT
-        rec[INS] = 0
-        add_experiment(exp_list, rec)
-    return exp_list
+    if numpy is not None and isinstance(matrix, numpy.ndarray):
+        return [tuple(row) for row in matrix.tolist()]
+    return [tuple(matrix[pos:pos + att_number])
+            for pos in xrange(0, len(matrix), att_number)]
 
 
-def gen_all_env_files(experiment_list):
+class LiveSet(object):
     '''
-    Generate all environment files
+    Live tuples of a table packed as rows of integers (LIVE_TYPECODE) in a
+    NumPy 2-D array, if available, otherwise in a row-major flat array.
+    With NumPy, the rows may be spilled to a memory-mapped file created in
+    spill_dir. The rows are used as an indexed pool: each deletion picks a
+    random position and fills it with the last row (O(1) per deletion)
     '''
-    for exp_rec in experiment_list:
-        gen_env_file(exp_rec)
 
+    def __init__(self, att_number, spill_dir=None):
+        self.att_number = att_number
+        self.size = 0
+        self.max_size = 0
+        self.max_bytes = 0
+        self.spill_file = None
+        if numpy is None:
+            self.buffer = array.array(LIVE_TYPECODE)
+            return
+        if spill_dir is not None:
+            spill_fd, self.spill_file = tempfile.mkstemp(
+                '.live', 'prefgen', spill_dir)
+            os.close(spill_fd)
+        self.buffer = self.alloc(LIVE_CAPACITY)
 
-def create_directories():
+    def alloc(self, capacity):
+        '''
+        Allocate NumPy buffer for capacity rows (file mapping is extended
+        if rows are spilled)
+        '''
+        shape = (capacity, self.att_number)
+        if self.spill_file is None:
+            buf = numpy.empty(shape, dtype=LIVE_TYPECODE)
+        else:
+            buf = numpy.memmap(self.spill_file, dtype=LIVE_TYPECODE,
+                               mode='r+', shape=shape)
+        self.max_bytes = max(self.max_bytes, buf.nbytes)
+        return buf
+
+    def reserve(self, size):
+        '''
+        Grow NumPy buffer (doubling its capacity) to hold size rows
+        '''
+        capacity = len(self.buffer)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        if self.spill_file is None:
+            buf = self.alloc(capacity)
+            buf[:self.size] = self.buffer[:self.size]
+            self.max_bytes = max(self.max_bytes,
+                                 buf.nbytes + self.buffer.nbytes)
+        else:
+            # Mapping is extended in place (rows stay in the file)
+            self.buffer.flush()
+            del self.buffer
+            buf = self.alloc(capacity)
+        self.buffer = buf
+
+    def extend(self, matrix):
+        '''
+        Add the records of a matrix (NumPy 2-D array or flat array)
+        '''
+        if numpy is None:
+            self.buffer.fromlist(list(matrix))
+            self.size = len(self.buffer) / self.att_number
+            self.max_bytes = max(self.max_bytes, self.get_bytes())
+        else:
+            size = self.size + len(matrix)
+            self.reserve(size)
+            self.buffer[self.size:size] = matrix
+            self.size = size
+        self.max_size = max(self.max_size, self.size)
+
+    def delete(self, tup_number, rand=None):
+        '''
+        Delete random records and return them as a list of row tuples.
+        The random function rand defaults to random.random
+        '''
+        if rand is None:
+            rand = random.random
+        if numpy is not None:
+            return self.delete_rows(tup_number, rand)
+        buf = self.buffer
+        att_number = self.att_number
+        deleted_list = []
+        for _ in xrange(min(tup_number, self.size)):
+            # Pick a random position and move the last record to it
+            pos = int(rand() * self.size)
+            self.size -= 1
+            start = pos * att_number
+            last = self.size * att_number
+            deleted_list.append(tuple(buf[start:start + att_number]))
+            if pos < self.size:
+                buf[start:start + att_number] = buf[last:]
+            del buf[last:]
+        return deleted_list
+
+    def delete_rows(self, tup_number, rand):
+        '''
+        Delete random records from NumPy buffer. Moves are first computed
+        over row indexes (source row of every moved position), so records
+        are read and moved by vectorized indexing
+        '''
+        source_dict = {}
+        source_pop = source_dict.pop
+        deleted_list = []
+        deleted_append = deleted_list.append
+        size = self.size
+        for _ in xrange(min(tup_number, size)):
+            # Pick a random position and move the last record to it
+            pos = int(rand() * size)
+            size -= 1
+            deleted_append(source_pop(pos, pos))
+            if pos < size:
+                source_dict[pos] = source_pop(size, size)
+        self.size = size
+        if not deleted_list:
+            return []
+        row_list = [tuple(row)
+                    for row in self.buffer[deleted_list].tolist()]
+        if source_dict:
+            self.buffer[source_dict.keys()] = \
+                self.buffer[source_dict.values()]
+        return row_list
+
+    def get_bytes(self):
+        '''
+        Get size (in bytes) of the buffer
+        '''
+        if numpy is None:
+            return self.buffer.buffer_info()[1] * self.buffer.itemsize
+        return self.buffer.nbytes
+
+    def get_report(self):
+        '''
+        Get report of memory used by live tuples (peak buffer bytes per
+        live tuple at the maximum number of live tuples)
+        '''
+        row_bytes = self.att_number * array.array(LIVE_TYPECODE).itemsize
+        report = str(self.max_size) + ' live tuples, ' + \
+            str(round(float(self.max_bytes) / max(self.max_size, 1), 1)) + \
+            ' bytes per live tuple (' + str(row_bytes) + ' packed)'
+        if self.spill_file is not None:
+            report += ', spilled'
+        return report
+
+    def close(self):
+        '''
+        Release buffer (removing spill file)
+        '''
+        self.buffer = None
+        if self.spill_file is not None:
+            os.remove(self.spill_file)
+            self.spill_file = None
+
+
+class TableWriter(object):
     '''
-    Create directories
+    Writer of table files using StremPref format. The file is kept open
+    (buffered) until the writer is closed
     '''
-    for directory in DIR_LIST:
-        if not os.path.exists(directory):
-            os.mkdir(directory)
 
+    def __init__(self, filename, att_number):
+        self.filename = filename
+        self.att_number = att_number
+        self.out_file = self.open_file(filename)
+        self.out_write = csv.writer(self.out_file)
+        self.header_written = False
 
-def get_detail_file(algorithm, experiment_id, count):
+    def open_file(self, filename):  # IGNORE:no-self-use
+        '''
+        Open table file for writing
+        '''
+        return open(filename, 'w', FILE_BUFFER_SIZE)
+
+    def write(self, timestamp, operation, record_list):
+        '''
+        Write a batch of records (row tuples). Records with more attributes
+        than the table are projected on the first attributes
+        '''
+        # Skip empty batches
+        if not len(record_list):
+            return
+        # Write file header before the first record
+        if not self.header_written:
+            self.out_write.writerow([TS_ATT, OP_ATT] +
+                                    ['A' + str(number + 1)
+                                     for number in range(self.att_number)])
+            self.header_written = True
+        # Write records with attributes _TS and _FL in the beginning
+        prefix = (timestamp, operation)
+        if len(record_list[0]) > self.att_number:
+            att_number = self.att_number
+            self.out_write.writerows(prefix + rec[:att_number]
+                                     for rec in record_list)
+        else:
+            self.out_write.writerows(prefix + rec for rec in record_list)
+
+    def close(self):
+        '''
+        Close table file
+        '''
+        self.out_file.close()
+
+
+class GzipTableWriter(TableWriter):
     '''
-    Get filename for experiment details
+    Writer of CSV table files compressed with gzip
     '''
-    return DETAILS_DIR + os.sep + algorithm + '-' + \
-        experiment_id + '.' + str(count) + '.csv'
 
+    def open_file(self, filename):
+        return gzip.open(filename, 'wb', COMPRESS_LEVEL)
 
-def run(algorithm, experiment_id, count):
+
+class Bz2TableWriter(TableWriter):
     '''
-    Run experiment for range and slide
+    Writer of CSV table files compressed with bzip2
     '''
-    detail_file = get_detail_file(algorithm, experiment_id, count)
-    if not os.path.isfile(detail_file):
-        command = RUN_COMMAND.format(alg=algorithm, id=experiment_id,
-                                     det=detail_file, max=ITERATION_DEFAULT)
-        print command
-        os.system(command)
-        if not os.path.isfile(detail_file):
-            print 'Detail results file not found: ' + detail_file
-            print "Check if 'streampref' is in path"
 
+    def open_file(self, filename):
+        return bz2.BZ2File(filename, 'w', FILE_BUFFER_SIZE, COMPRESS_LEVEL)
 
-def run_experiments(experiment_list):
+
+class BufferTableWriter(TableWriter):
     '''
-    Run all experiments
+    Writer of CSV tables into a memory buffer (used to stream tables)
     '''
-    for count in range(RUN_COUNT):
-        for alg in ALGORITHM_LIST:
-            for exp_rec in experiment_list:
-                exp_id = get_experiment_id(exp_rec)
-                run(alg, exp_id, count + 1)
 
+    def open_file(self, filename):
+        return cStringIO.StringIO()
+
+    def take(self):
+        '''
+        Return data written since last call and clear the buffer
+        '''
+        data = self.out_file.getvalue()
+        self.out_file.seek(0)
+        self.out_file.truncate()
+        return data
 
-def get_summaries(detail_file):
+
+class BinaryTableWriter(object):
     '''
-    Import a result file to database
+    Writer of table files using binary columnar format.
+    Every batch is appended to one temporary file per column (created next
+    to the table file) and the columns are concatenated after the header
+    on close, so memory use is limited to a batch
     '''
-    if not os.path.isfile(detail_file):
-        print 'File does not exists: ' + detail_file
-        return (float('NaN'), float('NaN'))
-    in_file = open(detail_file, 'r')
-    reader = csv.DictReader(in_file, skipinitialspace=True)
-    sum_time = 0.0
-    sum_memory = 0.0
-    count = 0
-    for rec in reader:
-        sum_time += float(rec[RUNTIME])
-        sum_memory += float(rec[MEMORY])
-        count += 1
-    in_file.close()
-    return (sum_time, sum_memory / count)
+
+    def __init__(self, filename, att_number):
+        self.filename = filename
+        self.att_number = att_number
+        self.row_count = 0
+        self.column_files = [tempfile.TemporaryFile(
+            dir=os.path.dirname(os.path.abspath(filename)))
+                             for _ in range(att_number + 2)]
+
+    def write(self, timestamp, operation, record_list):
+        '''
+        Write a batch of records (row tuples). Records with more attributes
+        than the table are projected on the first attributes
+        '''
+        if not len(record_list):
+            return
+        size = len(record_list)
+        column_list = [array.array('i', [timestamp]) * size,
+                       array.array('i', [1 if operation == '+' else -1]) *
+                       size]
+        column_list.extend(array.array('i', values) for values in
+                           itertools.islice(itertools.izip(*record_list),
+                                            self.att_number))
+        for column, column_file in zip(column_list, self.column_files):
+            if sys.byteorder == 'big':
+                column.byteswap()
+            column.tofile(column_file)
+        self.row_count += size
+
+    def close(self):
+        '''
+        Write header and columns to table file (removing temporary files)
+        '''
+        out_file = open(self.filename, 'wb', FILE_BUFFER_SIZE)
+        out_file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION,
+                                          self.att_number, self.row_count))
+        for column_file in self.column_files:
+            column_file.seek(0)
+            shutil.copyfileobj(column_file, out_file, FILE_BUFFER_SIZE)
+            column_file.close()
+        out_file.close()
+
+
+# Table writer for each format
+WRITER_DICT = {CSV: TableWriter, CSV_GZ: GzipTableWriter,
+               CSV_BZ2: Bz2TableWriter, BINARY: BinaryTableWriter}
 
 
-def get_average(detail_file, only_first):
+def get_table_format(filename):
     '''
-    Get average for first iteration or other iterations
+    Get table format from filename extension
     '''
-    if not os.path.isfile(detail_file):
-        print 'File does not exists: ' + detail_file
-        return (float('NaN'), float('NaN'))
-    in_file = open(detail_file, 'r')
-    reader = csv.DictReader(in_file, skipinitialspace=True)
-    sum_time = 0.0
-    sum_memory = 0.0
-    first_rec = reader.next()
-    if only_first:
-        sum_time = float(first_rec[RUNTIME])
-        sum_memory = float(first_rec[MEMORY])
-        return (sum_time, sum_memory)
-    count = 0
-    for rec in reader:
-        sum_time += float(rec[RUNTIME])
-        sum_memory += float(rec[MEMORY])
-        count += 1
+    for table_format in sorted(FORMAT_LIST, key=len, reverse=True):
+        if filename.endswith('.' + table_format):
+            return table_format
+    raise ValueError('Unknown table format: ' + filename)
+
+
+def get_table_writer(filename, att_number):
+    '''
+    Get a table writer for the format of filename
+    '''
+    return WRITER_DICT[get_table_format(filename)](filename, att_number)
+
+
+def read_csv_rows(filename):
+    '''
+    Read a CSV table and return (attributes number, iterator of rows
+    (timestamp, operation, record))
+    '''
+    table_format = get_table_format(filename)
+    if table_format == CSV_GZ:
+        in_file = gzip.open(filename, 'rb')
+    elif table_format == CSV_BZ2:
+        in_file = bz2.BZ2File(filename, 'r', FILE_BUFFER_SIZE)
+    else:
+        in_file = open(filename, 'r', FILE_BUFFER_SIZE)
+    reader = csv.reader(in_file)
+    header = next(reader, None)
+    if header is None:
+        in_file.close()
+        return (0, iter([]))
+
+    def gen_rows():
+        '''
+        Generate rows of the file
+        '''
+        for row in reader:
+            yield (int(row[0]), row[1], tuple(int(value)
+                                              for value in row[2:]))
+        in_file.close()
+    return (len(header) - 2, gen_rows())
+
+
+def read_binary_rows(filename):
+    '''
+    Read a binary table and return (attributes number, iterator of rows
+    (timestamp, operation, record))
+    '''
+    in_file = open(filename, 'rb')
+    magic, version, att_number, row_number = \
+        BINARY_HEADER.unpack(in_file.read(BINARY_HEADER.size))
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        in_file.close()
+        raise ValueError('Invalid binary table: ' + filename)
+    column_list = []
+    for _ in range(att_number + 2):
+        column = array.array('i')
+        column.fromfile(in_file, row_number)
+        if sys.byteorder == 'big':
+            column.byteswap()
+        column_list.append(column)
     in_file.close()
-    return (sum_time / count, sum_memory / count)
+    op_dict = {1: '+', -1: '-'}
+    rows = ((ts, op_dict[op], rec) for ts, op, rec in
+            itertools.izip(column_list[0], column_list[1],
+                           itertools.izip(*column_list[2:])))
+    return (att_number, rows)
 
 
-def get_basename(key, experiment):
+def read_table(filename):
     '''
-    Get a base name for key and experiment
+    Read a table file of any format and return (attributes number,
+    iterator of batches (timestamp, operation, record list))
     '''
-    basename = key
-    if key != DEL and experiment[DEL] == 0:
-        basename += '_no_del'
-    if key != INS and experiment[INS] == 0:
-        basename += '_no_ins'
-    return basename
+    if get_table_format(filename) == BINARY:
+        att_number, rows = read_binary_rows(filename)
+    else:
+        att_number, rows = read_csv_rows(filename)
+    batch_iter = ((key[0], key[1], [row[2] for row in group])
+                  for key, group in
+                  itertools.groupby(rows, key=lambda row: row[:2]))
+    return (att_number, batch_iter)
 
 
-def summarize_details(key, value_list, default_experiment):
+def convert_table(in_filename, out_filename):
     '''
-    Summarize experiments details
+    Convert a table file between formats (according to filename extensions)
     '''
-    time_list = []
-    mem_list = []
-    exp_rec = default_experiment.copy()
-    for value in value_list:
-        exp_rec[key] = value
-        for rcount in range(RUN_COUNT):
-            time_rec = {key: value}
-            mem_rec = {key: value}
-            for alg in ALGORITHM_LIST:
-                dfile = get_detail_file(alg, get_experiment_id(exp_rec),
-                                        rcount + 1)
-                runtime, memory = get_summaries(dfile)
-                time_rec[alg] = runtime
-                mem_rec[alg] = memory
-            time_list.append(time_rec)
-            mem_list.append(mem_rec)
-    fname = RUNTIME_SUMMARY_DIR + os.sep + get_basename(key, exp_rec) + '.csv'
-    write_file(fname, key, time_list)
-    fname = MEMORY_SUMMARY_DIR + os.sep + get_basename(key, exp_rec) + '.csv'
-    write_file(fname, key, mem_list)
+    att_number, batch_iter = read_table(in_filename)
+    store_table(out_filename, att_number, batch_iter)
 
 
-def summarize_iterations():
+def store_table(filename, att_number, batch_iter):
     '''
-    Summarize experiments details
+    Store a stream of record batches in file table using the format of the
+    filename extension. The batches are tuples (timestamp, operation,
+    record list)
     '''
-    exp_rec = {ATT: ATTRIBUTE_DEFAULT, TUP: TUPLE_DEFAULT,
-               DEL: DELETION_DEFAULT, INS: INSERTION_DEFAULT,
-               RUL: RULE_DEFAULT, LEV: LEVEL_DEFAULT, IND: INDIFF_DEFAULT,
-               TOP: TOPK_DEFAULT}
-    time_list = []
-    mem_list = []
-    for rcount in range(RUN_COUNT):
-        for alg in ALGORITHM_LIST:
-            time_rec = {ALGORITHM: alg}
-            mem_rec = {ALGORITHM: alg}
-            dfile = get_detail_file(alg, get_experiment_id(exp_rec),
-                                    rcount + 1)
-            runtime, memory = get_average(dfile, only_first=True)
-            time_rec[FIRST] = runtime
-            mem_rec[FIRST] = memory
-            runtime, memory = get_average(dfile, only_first=False)
-            time_rec[OTHERS] = runtime
-            mem_rec[OTHERS] = memory
-            time_list.append(time_rec)
-            mem_list.append(mem_rec)
-    fname = RUNTIME_SUMMARY_DIR + os.sep + 'iterations.csv'
-    write_file(fname, ALGORITHM, time_list)
-    fname = MEMORY_SUMMARY_DIR + os.sep + 'iterations.csv'
-    write_file(fname, ALGORITHM, mem_list)
+    writer = get_table_writer(filename, att_number)
+    for timestamp, operation, record_list in batch_iter:
+        writer.write(timestamp, operation, record_list)
+    writer.close()
 
 
-def summarize_all():
+def get_table_id(exp_conf):
     '''
-    Summarize all results
+    Return a table ID for given parameters
     '''
-    exp = {}
-    exp[ATT] = ATTRIBUTE_LIST
-    exp[TUP] = TUPLE_LIST
-    exp[INS] = INSERTION_LIST
-    exp[RUL] = RULE_LIST
-    exp[LEV] = LEVEL_LIST
-    exp[IND] = INDIFF_LIST
-    exp[TOP] = TOPK_LIST
-    def_rec = {ATT: ATTRIBUTE_DEFAULT, TUP: TUPLE_DEFAULT,
-               DEL: DELETION_DEFAULT, INS: INSERTION_DEFAULT,
-               RUL: RULE_DEFAULT, LEV: LEVEL_DEFAULT, IND: INDIFF_DEFAULT,
-               TOP: TOPK_DEFAULT}
-    # Insertions and deletions
-    for key in exp:
-        summarize_details(key, exp[key], def_rec)
-    # No deletions
-    def_rec = {ATT: ATTRIBUTE_DEFAULT, TUP: TUPLE_DEFAULT,
-               DEL: 0, INS: INSERTION_DEFAULT,
-               RUL: RULE_DEFAULT, LEV: LEVEL_DEFAULT, IND: INDIFF_DEFAULT,
-               TOP: TOPK_DEFAULT}
-    for key in exp:
-        summarize_details(key, exp[key], def_rec)
-    # No insertions
-    def_rec = {ATT: ATTRIBUTE_DEFAULT, TUP: TUPLE_DEFAULT,
-               DEL: DELETION_DEFAULT, INS: 0,
-               RUL: RULE_DEFAULT, LEV: LEVEL_DEFAULT, IND: INDIFF_DEFAULT,
-               TOP: TOPK_DEFAULT}
-    for key in exp:
-        if key != INS:
-            summarize_details(key, exp[key], def_rec)
-    # Deletions (with maximum number of tuples)
-    def_rec = {ATT: ATTRIBUTE_DEFAULT, TUP: TUPLE_MAX,
-               DEL: DELETION_DEFAULT, INS: INSERTION_DEFAULT,
-               RUL: RULE_DEFAULT, LEV: LEVEL_DEFAULT, IND: INDIFF_DEFAULT,
-               TOP: TOPK_DEFAULT}
-    summarize_details(DEL, DELETION_LIST, def_rec)
-    def_rec[INS] = 0
-    summarize_details(DEL, DELETION_LIST, def_rec)
-    summarize_iterations()
+    return ATT + str(exp_conf[ATT]) + \
+        TUP + str(exp_conf[TUP]) + \
+        DEL + str(exp_conf[DEL]) + \
+        INS + str(exp_conf[INS]) + \
+        get_distribution_id(exp_conf) + \
+        get_selectivity_id(exp_conf)
 
 
-def confidence_interval(key, in_file, out_file):
+def get_distribution_id(exp_conf):
     '''
-    Calculate final result with confidence interval
+    Return the ID of the value distribution of a table (empty for uniform)
     '''
-    if not os.path.isfile(in_file):
-        print 'File does not exists: ' + in_file
-        return
-    command = CONFINTERVAL_COMMAND.format(inf=in_file, outf=out_file, keyf=key)
-    print command
-    os.system(command)
-    if not os.path.isfile(out_file):
-        print 'Output file not found: ' + out_file
-        print "Check if 'confinterval.py' is in path"
-
-
-def confidence_interval_all():
-    '''
-    Calculate confidence interval for all results
-    '''
-    # Deletions and insertions
-    key_list = [ATT, TUP, DEL, INS, RUL, LEV, IND, TOP]
-    for key in key_list:
-        in_file = RUNTIME_SUMMARY_DIR + os.sep + key + '.csv'
-        out_file = RUNTIME_RESULT_DIR + os.sep + key + '.csv'
-        confidence_interval(key, in_file, out_file)
-        in_file = MEMORY_SUMMARY_DIR + os.sep + key + '.csv'
-        out_file = MEMORY_RESULT_DIR + os.sep + key + '.csv'
-        confidence_interval(key, in_file, out_file)
-    # No deletions
-    key_list = [ATT, TUP, INS, RUL, LEV, IND, TOP]
-    for key in key_list:
-        in_file = RUNTIME_SUMMARY_DIR + os.sep + key + '_no_del.csv'
-        out_file = RUNTIME_RESULT_DIR + os.sep + key + '_no_del.csv'
-        confidence_interval(key, in_file, out_file)
-        in_file = MEMORY_SUMMARY_DIR + os.sep + key + '_no_del.csv'
-        out_file = MEMORY_RESULT_DIR + os.sep + key + '_no_del.csv'
-        confidence_interval(key, in_file, out_file)
-    # No insertions
-    key_list = [ATT, TUP, DEL, RUL, LEV, IND, TOP]
-    for key in key_list:
-        in_file = RUNTIME_SUMMARY_DIR + os.sep + key + '_no_ins.csv'
-        out_file = RUNTIME_RESULT_DIR + os.sep + key + '_no_ins.csv'
-        confidence_interval(key, in_file, out_file)
-        in_file = MEMORY_SUMMARY_DIR + os.sep + key + '_no_ins.csv'
-        out_file = MEMORY_RESULT_DIR + os.sep + key + '_no_ins.csv'
-        confidence_interval(key, in_file, out_file)
-    # Iterations
-    in_file = RUNTIME_SUMMARY_DIR + os.sep + 'iterations.csv'
-    out_file = RUNTIME_RESULT_DIR + os.sep + 'iterations.csv'
-    confidence_interval(ALGORITHM, in_file, out_file)
-    in_file = MEMORY_SUMMARY_DIR + os.sep + 'iterations.csv'
-    out_file = MEMORY_RESULT_DIR + os.sep + 'iterations.csv'
-    confidence_interval(ALGORITHM, in_file, out_file)
+    if exp_conf[DIS] == UNIFORM:
+        return ''
+    return DIS + exp_conf[DIS]
 
 
-def write_file(fname, id_field, record_list):
+def get_selectivity_id(exp_conf):
     '''
-    Write record_list to file
+    Return the ID of the selectivity of a table (empty for uniform values).
+    Tables with selectivity depend on the rules (number of rules, levels
+    and arity)
     '''
-    # Check if list of records is not empty
-    if len(record_list):
-        # Build field list without identifier field
-        field_list = [field for field in record_list[0].keys()
-                      if field != id_field]
-        # Sort field list
-        field_list.sort()
-        # Insert identifier field in the beginning of the list
-        field_list.insert(0, id_field)
-        output_file = open(fname, 'w')
-        writer = csv.DictWriter(output_file, field_list,
-                                delimiter=',')
-        header = {field: field for field in field_list}
-        writer.writerow(header)
-        for rec in record_list:
-            writer.writerow(rec)
-        output_file.close()
+    if exp_conf[SEL] <= 0:
+        return ''
+    return SEL + str(exp_conf[SEL]) + \
+        RUL + str(exp_conf[RUL]) + \
+        LEV + str(exp_conf[LEV]) + \
+        get_arity_id(exp_conf)
 
 
-def get_arguments(print_help=False):
+def get_arity_id(exp_conf):
     '''
-    Get arguments
+    Return the ID of the condition arity of rules (empty for default arity)
     '''
-    import argparse
-    parser = argparse.ArgumentParser(os.path.basename(__file__))
-    parser.add_argument('-g', '--gen', action="store_true",
-                        default=False,
-                        help='Generate files')
-    parser.add_argument('-r', '--run', action="store_true",
-                        default=False,
-                        help='Run experiments')
-    parser.add_argument('-s', '--summarize', action="store_true",
-                        default=False,
-                        help='Summarize results')
-    args = parser.parse_args()
-    if print_help:
-        parser.print_help()
-    return args
+    if exp_conf[ARI] == ARITY_DEFAULT:
+        return ''
+    return ARI + str(exp_conf[ARI])
 
 
-def main():
+def get_query_id(exp_conf):
     '''
-    Main routine
+    Return a query ID for given parameters
     '''
-    exp_list = gen_experiment_list()
-    args = get_arguments()
-    if args.gen:
-        create_directories()
-        print 'Generating table data'
-        gen_all_tables(exp_list)
+    operation = 'best'
+    if exp_conf[TOP] != -1:
+        operation = TOP + str(exp_conf[TOP])
+    return RUL + str(exp_conf[RUL]) + \
+        LEV + str(exp_conf[LEV]) + \
+        IND + str(exp_conf[IND]) + \
+        get_arity_id(exp_conf) + \
+        operation
+
+
+def get_experiment_id(exp_conf):
+    '''
+    Return the ID of an experiment
+    '''
+    return get_table_id(exp_conf) + get_query_id(exp_conf)
+
+
+def get_table_seed(table_id):
+    '''
+    Return a deterministic seed for a table ID
+    '''
+    digest = hashlib.md5(str(SEED) + table_id).hexdigest()
+    return int(digest[:8], 16)
+
+
+def set_seed(seed):
+    '''
+    Set seed of random generators
+    '''
+    random.seed(seed)
+    if numpy is not None:
+        numpy.random.seed(seed)
+
+
+def get_table_file(exp_conf):
+    '''
+    Get filename of table
+    '''
+    return DATA_DIR + os.sep + get_table_id(exp_conf) + '.' + TABLE_FORMAT
+
+
+def get_query_file(exp_conf):
+    '''
+    Get filename of query
+    '''
+    return QUERIES_DIR + os.sep + get_query_id(exp_conf) + '.cql'
+
+
+def get_env_file(exp_conf):
+    '''
+    Get filename of environment file
+    '''
+    return ENV_DIR + os.sep + get_experiment_id(exp_conf) + '.env'
+
+
+def get_table_inputs(exp_conf):
+    '''
+    Get inputs used to generate a table
+    '''
+    table_id = get_table_id(exp_conf)
+    inputs = {'version': GENERATOR_VERSION, 'id': table_id,
+              ATT: exp_conf[ATT], TUP: exp_conf[TUP], DEL: exp_conf[DEL],
+              INS: exp_conf[INS], 'max_value': MAX_VALUE,
+              'iterations': ITERATION_DEFAULT,
+              'seed': get_table_seed(table_id),
+              'numpy': numpy is not None, 'format': TABLE_FORMAT}
+    if exp_conf[DIS] != UNIFORM:
+        inputs.update({DIS: exp_conf[DIS], 'zipf': ZIPF_EXPONENT,
+                       'clusters': [CLUSTER_NUMBER, CLUSTER_DEVIATION],
+                       'correlation': CORRELATION_DEVIATION})
+    # Tables with selectivity depend on the rules
+    if exp_conf[SEL] > 0:
+        inputs.update({SEL: exp_conf[SEL], 'rules': get_rule_index(exp_conf)})
+    # Initial tuples generated in chunks
+    if exp_conf[TUP] > GEN_CHUNK_SIZE:
+        inputs['chunk'] = GEN_CHUNK_SIZE
+    return inputs
+
+
+def get_query_inputs(exp_conf):
+    '''
+    Get inputs used to generate a query
+    '''
+    return {'version': GENERATOR_VERSION, 'id': get_query_id(exp_conf),
+            RUL: exp_conf[RUL], LEV: exp_conf[LEV], IND: exp_conf[IND],
+            TOP: exp_conf[TOP], ARI: exp_conf[ARI], 'max_value': MAX_VALUE,
+            'seed': get_table_seed(get_query_id(exp_conf)),
+            'rule': RULE_STRING, 'condition': RULE_CONDITION, 'query': QUERY}
+
+
+def get_env_inputs(exp_conf):
+    '''
+    Get inputs used to generate an environment file
+    '''
+    return {'version': GENERATOR_VERSION,
+            'table': get_table_file(exp_conf),
+            'query': get_query_file(exp_conf), ATT: exp_conf[ATT]}
+
+
+def get_inputs_hash(input_dict):
+    '''
+    Get hash of the inputs of a generated file
+    '''
+    return hashlib.md5(json.dumps(input_dict, sort_keys=True)).hexdigest()
+
+
+def get_file_checksum(filename):
+    '''
+    Get MD5 checksum of a file
+    '''
+    md5 = hashlib.md5()
+    in_file = open(filename, 'rb')
+    for block in iter(lambda: in_file.read(FILE_BUFFER_SIZE), ''):
+        md5.update(block)
+    in_file.close()
+    return md5.hexdigest()
+
+
+def get_partial_file(filename):
+    '''
+    Get temporary filename used while a file is generated (renamed when
+    complete). The extension is kept, as it gives the table format
+    '''
+    dirname, basename = os.path.split(filename)
+    return os.path.join(dirname, '.' + str(os.getpid()) + '.' + basename)
+
+
+def get_manifest_entry(filename, inputs_hash):
+    '''
+    Get manifest entry of a generated file
+    '''
+    stat = os.stat(filename)
+    return {INPUTS: inputs_hash, CHECKSUM: get_file_checksum(filename),
+            SIZE: stat.st_size, MTIME: stat.st_mtime}
+
+
+def load_manifest():
+    '''
+    Load manifest of generated files, including the entries of the log
+    (files generated by an interrupted generation). An incomplete last
+    line of the log, from an interrupted write, is ignored
+    '''
+    manifest = {}
+    if os.path.isfile(MANIFEST_FILE):
+        in_file = open(MANIFEST_FILE, 'r')
+        manifest = json.load(in_file)
+        in_file.close()
+    if os.path.isfile(MANIFEST_LOG):
+        in_file = open(MANIFEST_LOG, 'r')
+        for line in in_file:
+            try:
+                filename, entry = json.loads(line)
+            except ValueError:
+                continue
+            manifest[filename] = entry
+        in_file.close()
+    return manifest
+
+
+def record_manifest_entry(manifest, filename, entry):
+    '''
+    Add entry of a generated file to the manifest and append it to the log,
+    so it is kept if the generation is interrupted
+    '''
+    manifest[filename] = entry
+    out_file = open(MANIFEST_LOG, 'a')
+    out_file.write(json.dumps([filename, entry], sort_keys=True) + '\n')
+    out_file.close()
+
+
+def store_manifest(manifest):
+    '''
+    Store manifest of generated files (replacing the old one atomically)
+    and remove the log of its entries
+    '''
+    tmp_file = MANIFEST_FILE + '.tmp'
+    out_file = open(tmp_file, 'w')
+    json.dump(manifest, out_file, sort_keys=True, indent=1)
+    out_file.close()
+    os.rename(tmp_file, MANIFEST_FILE)
+    if os.path.isfile(MANIFEST_LOG):
+        os.remove(MANIFEST_LOG)
+
+
+def is_stale(manifest, filename, inputs_hash):
+    '''
+    Check if a file must be (re)generated: it does not exist, it was
+    generated from other inputs or its content was changed
+    '''
+    entry = manifest.get(filename)
+    if entry is None or entry[INPUTS] != inputs_hash or \
+            not os.path.isfile(filename):
+        return True
+    # Checksum is verified only if size or modification time changed
+    stat = os.stat(filename)
+    if stat.st_size == entry[SIZE] and stat.st_mtime == entry[MTIME]:
+        return False
+    if get_file_checksum(filename) != entry[CHECKSUM]:
+        return True
+    entry[SIZE] = stat.st_size
+    entry[MTIME] = stat.st_mtime
+    return False
+
+
+def get_stale_list(manifest, experiment_list, file_function,
+                   inputs_function):
+    '''
+    Return experiments whose files must be (re)generated
+    '''
+    return [exp_rec for exp_rec in experiment_list
+            if is_stale(manifest, file_function(exp_rec),
+                        get_inputs_hash(inputs_function(exp_rec)))]
+
+
+def gen_table_batches(exp_conf, iteration_number=ITERATION_DEFAULT,
+                      live_set=None):
+    '''
+    Generate the batches of a table as tuples (timestamp, operation, records)
+    for iteration_number instants (unlimited if zero).
+    The live tuples are kept in live_set (a new LiveSet if None).
+    Initial tuples are generated (and returned) in chunks
+    '''
+    att_number = exp_conf[ATT]
+    if live_set is None:
+        live_set = LiveSet(att_number, SPILL_DIR)
+    # Seed random generators using table ID (same data on any process)
+    set_seed(get_table_seed(get_table_id(exp_conf)))
+    rule_index = get_rule_index(exp_conf)
+    # Generate initial tuples
+    for matrix in gen_stream_chunks(exp_conf[TUP], att_number, rule_index,
+                                    exp_conf[SEL], exp_conf[DIS]):
+        live_set.extend(matrix)
+        yield (0, '+', get_rows(matrix, att_number))
+    if iteration_number > 0:
+        timestamp_iter = xrange(1, iteration_number)
+    else:
+        timestamp_iter = itertools.count(1)
+    # Generate record for each iteration
+    for timestamp in timestamp_iter:
+        yield (timestamp, '-', live_set.delete(exp_conf[DEL]))
+        matrix = gen_stream_matrix(exp_conf[INS], att_number, rule_index,
+                                   exp_conf[SEL], exp_conf[DIS])
+        live_set.extend(matrix)
+        yield (timestamp, '+', get_rows(matrix, att_number))
+
+
+def gen_table(exp_conf):
+    '''
+    Generate table and return its manifest entry as (filename, entry).
+    Memory used by live tuples is reported at the end
+    '''
+    filename = get_table_file(exp_conf)
+    partial_file = get_partial_file(filename)
+    live_set = LiveSet(exp_conf[ATT], SPILL_DIR)
+    try:
+        store_table(partial_file, exp_conf[ATT],
+                    gen_table_batches(exp_conf, live_set=live_set))
+        os.rename(partial_file, filename)
+    finally:
+        live_set.close()
+        remove_file(partial_file)
+    print filename + ': ' + live_set.get_report()
+    sys.stdout.flush()
+    inputs_hash = get_inputs_hash(get_table_inputs(exp_conf))
+    return (filename, get_manifest_entry(filename, inputs_hash))
+
+
+def get_unique_list(experiment_list, id_function):
+    '''
+    Return experiments with distinct IDs (according to id_function)
+    '''
+    id_set = set()
+    unique_list = []
+    for exp_rec in experiment_list:
+        exp_id = id_function(exp_rec)
+        if exp_id not in id_set:
+            id_set.add(exp_id)
+            unique_list.append(exp_rec)
+    return unique_list
+
+
+def run_jobs(function, conf_list, jobs, label):
+    '''
+    Apply function to every configuration of a list using a pool of
+    processes (if jobs > 1) and report progress. Yield the results as they
+    are available
+    '''
+    pool = None
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs)
+        result_iter = pool.imap_unordered(function, conf_list)
+    else:
+        result_iter = itertools.imap(function, conf_list)
+    start = time.time()
+    total = len(conf_list)
+    for count, result in enumerate(result_iter, 1):
+        elapsed = max(time.time() - start, 1e-9)
+        print '{c}/{t} {l} ({r:.2f} {l}/s)'.format(c=count, t=total, l=label,
+                                                   r=count / elapsed)
+        yield result
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+
+def gen_all_files(experiment_list, jobs, manifest, functions, label):
+    '''
+    Generate files with distinct IDs which are stale in the manifest.
+    The functions are (ID, filename, inputs, generation) functions
+    '''
+    id_function, file_function, inputs_function, gen_function = functions
+    conf_list = get_unique_list(experiment_list, id_function)
+    stale_list = get_stale_list(manifest, conf_list, file_function,
+                                inputs_function)
+    print str(len(conf_list) - len(stale_list)) + ' ' + label + \
+        ' up to date'
+    for filename, entry in run_jobs(gen_function, stale_list, jobs, label):
+        record_manifest_entry(manifest, filename, entry)
+
+
+def get_shape_id(exp_conf):
+    '''
+    Return the ID of a stream shape (deletions and insertions per instant,
+    value distribution and selectivity)
+    '''
+    return DEL + str(exp_conf[DEL]) + INS + str(exp_conf[INS]) + \
+        get_distribution_id(exp_conf) + get_selectivity_id(exp_conf)
+
+
+def get_derived_groups(experiment_list):
+    '''
+    Group distinct tables by stream shape. Return a list of tuples
+    (base configuration, table configurations) where the base has the
+    maximum number of attributes and tuples of the group
+    '''
+    group_dict = OrderedDict()
+    for exp_rec in get_unique_list(experiment_list, get_table_id):
+        group_dict.setdefault(get_shape_id(exp_rec), []).append(exp_rec)
+    group_list = []
+    for conf_list in group_dict.values():
+        # Other parameters (same shape) are taken from the first table
+        base_conf = dict(conf_list[0])
+        base_conf.update({ATT: max(conf[ATT] for conf in conf_list),
+                          TUP: max(conf[TUP] for conf in conf_list)})
+        group_list.append((Experiment(base_conf), conf_list))
+    return group_list
+
+
+def get_derived_inputs(exp_conf, base_conf):
+    '''
+    Get inputs used to generate a table derived from a base stream
+    '''
+    inputs = get_table_inputs(exp_conf)
+    inputs['base'] = get_table_id(base_conf)
+    inputs['seed'] = get_table_seed(get_shape_id(base_conf))
+    return inputs
+
+
+def gen_derived_batches(base_conf, tup_list, live_dict):
+    '''
+    Generate the batches of tables derived from a base stream as tuples
+    (timestamp, operation, records by number of initial tuples).
+    Every table starts with the first tuples of the base initial tuples and
+    has the same insertions. Each number of initial tuples has its own live
+    tuples (LiveSet of live_dict) and samples its deletions with its own
+    random generator
+    '''
+    shape_id = get_shape_id(base_conf)
+    att_number = base_conf[ATT]
+    # Seed random generators using shape ID (same data on any process)
+    set_seed(get_table_seed(shape_id))
+    rule_index = get_rule_index(base_conf)
+    rand_dict = {}
+    for tup_number in tup_list:
+        seed = get_table_seed(shape_id + TUP + str(tup_number))
+        rand_dict[tup_number] = random.Random(seed).random
+    # Generate initial tuples (each table takes the first ones)
+    start = 0
+    for matrix in gen_stream_chunks(base_conf[TUP], att_number, rule_index,
+                                    base_conf[SEL], base_conf[DIS]):
+        insert_list = get_rows(matrix, att_number)
+        batch_dict = {}
+        for tup_number in tup_list:
+            end = max(tup_number - start, 0)
+            live_dict[tup_number].extend(matrix[:end * att_number]
+                                         if numpy is None else matrix[:end])
+            batch_dict[tup_number] = insert_list[:end]
+        start += len(insert_list)
+        yield (0, '+', batch_dict)
+    # Generate record for each iteration
+    for timestamp in range(1, ITERATION_DEFAULT):
+        delete_dict = {}
+        for tup_number in tup_list:
+            delete_dict[tup_number] = \
+                live_dict[tup_number].delete(base_conf[DEL],
+                                             rand_dict[tup_number])
+        yield (timestamp, '-', delete_dict)
+        matrix = gen_stream_matrix(base_conf[INS], att_number, rule_index,
+                                   base_conf[SEL], base_conf[DIS])
+        for tup_number in tup_list:
+            live_dict[tup_number].extend(matrix)
+        yield (timestamp, '+', dict.fromkeys(tup_list,
+                                             get_rows(matrix, att_number)))
+
+
+def gen_derived_group(group):
+    '''
+    Generate all tables of a group (base configuration, table
+    configurations) in a single pass over the base stream.
+    Return the list of manifest entries as (filename, entry)
+    '''
+    base_conf, conf_list = group
+    tup_list = sorted(set(conf[TUP] for conf in conf_list))
+    # Tables are written to partial files (renamed when complete)
+    writer_list = [(conf, get_table_writer(
+        get_partial_file(get_table_file(conf)), conf[ATT]))
+                   for conf in conf_list]
+    live_dict = {tup_number: LiveSet(base_conf[ATT], SPILL_DIR)
+                 for tup_number in tup_list}
+    result_list = []
+    try:
+        for timestamp, operation, batch_dict in \
+                gen_derived_batches(base_conf, tup_list, live_dict):
+            for conf, writer in writer_list:
+                writer.write(timestamp, operation, batch_dict[conf[TUP]])
+        for tup_number in tup_list:
+            print get_shape_id(base_conf) + TUP + str(tup_number) + ': ' + \
+                live_dict[tup_number].get_report()
+        sys.stdout.flush()
+        for conf, writer in writer_list:
+            writer.close()
+            filename = get_table_file(conf)
+            os.rename(writer.filename, filename)
+            inputs_hash = get_inputs_hash(get_derived_inputs(conf, base_conf))
+            result_list.append((filename,
+                                get_manifest_entry(filename, inputs_hash)))
+    finally:
+        for live_set in live_dict.values():
+            live_set.close()
+        for _, writer in writer_list:
+            remove_file(writer.filename)
+    return result_list
+
+
+def is_stale_group(manifest, group):
+    '''
+    Check if some table of a group must be (re)generated
+    '''
+    base_conf, conf_list = group
+    return any(is_stale(manifest, get_table_file(conf),
+                        get_inputs_hash(get_derived_inputs(conf, base_conf)))
+               for conf in conf_list)
+
+
+def gen_all_derived_tables(experiment_list, jobs, manifest):
+    '''
+    Generate all tables deriving them from one base stream per shape
+    '''
+    group_list = get_derived_groups(experiment_list)
+    stale_list = [group for group in group_list
+                  if is_stale_group(manifest, group)]
+    print str(len(group_list) - len(stale_list)) + ' table groups up to date'
+    for result_list in run_jobs(gen_derived_group, stale_list, jobs,
+                                'table groups'):
+        for filename, entry in result_list:
+            record_manifest_entry(manifest, filename, entry)
+
+
+def gen_all_tables(experiment_list, jobs=1, manifest=None, derived=False):
+    '''
+    Generate all tables (derived from base streams if derived is True)
+    '''
+    if manifest is None:
+        manifest = {}
+    if derived:
+        gen_all_derived_tables(experiment_list, jobs, manifest)
+        return
+    gen_all_files(experiment_list, jobs, manifest,
+                  (get_table_id, get_table_file, get_table_inputs, gen_table),
+                  'tables')
+
+
+def gen_rule(rule_dict, condition_str=None):
+    '''
+    Convert rule dictionary into rule in string format
+    (condition_str is the string of the rule condition, if already built)
+    '''
+    if condition_str is None:
+        condition_str = get_condition_string(rule_dict['COND'])
+    return RULE_STRING.format(c=condition_str,
+                              a=len(rule_dict['COND']) + 1,
+                              b=rule_dict['BEST'],
+                              w=rule_dict['WORST'],
+                              i=rule_dict['INDIFF'])
+
+
+def get_condition_string(condition):
+    '''
+    Get string of a rule condition (tuple of values of A1..An)
+    '''
+    return ' AND '.join(RULE_CONDITION.format(a=att + 1, v=value)
+                        for att, value in enumerate(condition))
+
+
+class PreferenceGraph(object):
+    '''
+    Preference graph of the rules of a condition context (nodes are
+    values of the preferred attribute and edges go from better to worse
+    values). Preferences creating cycles (or repeated ones) are rejected,
+    so the rules of a query are consistent even when random chains of
+    gen_rule_dicts revisit values of earlier chains.
+    Each insertion visits only the values reachable from the worse value,
+    which are few in a context, so building the graphs of a query is
+    near-linear on the number of rules
+    '''
+
+    def __init__(self):
+        # Worse values by better value
+        self.edge_dict = {}
+
+    def is_reachable(self, source, target):
+        '''
+        Check if target is reachable from source
+        '''
+        # Values without worse values (as new ones) reach nothing
+        if source not in self.edge_dict:
+            return source == target
+        visited_set = set([source])
+        stack = [source]
+        while stack:
+            value = stack.pop()
+            if value == target:
+                return True
+            for next_value in self.edge_dict.get(value, ()):
+                if next_value not in visited_set:
+                    visited_set.add(next_value)
+                    stack.append(next_value)
+        return False
+
+    def add_preference(self, better, worse):
+        '''
+        Add preference better > worse.
+        Return False if it is repeated or would create a cycle
+        '''
+        if better == worse or \
+                worse in self.edge_dict.get(better, ()) or \
+                self.is_reachable(worse, better):
+            return False
+        self.edge_dict.setdefault(better, set()).add(worse)
+        return True
+
+
+def gen_contexts(arity):
+    '''
+    Generate condition contexts (tuples of values 1..MAX_VALUE for
+    A1..An, the last attribute varying fastest)
+    '''
+    return itertools.product(range(1, MAX_VALUE + 1), repeat=arity)
+
+
+def check_rule_attributes(exp_conf):
+    '''
+    Check the arity and the number of levels of the rules of an experiment
+    and if their condition, preferred and indifferent attributes are
+    attributes of its table
+    '''
+    if exp_conf[ARI] < 1:
+        raise ValueError('Invalid condition arity: ' + str(exp_conf[ARI]))
+    if exp_conf[LEV] < 1:
+        raise ValueError('Invalid number of levels: ' + str(exp_conf[LEV]))
+    # A chain needs LEV + 1 distinct values
+    if exp_conf[LEV] >= MAX_VALUE:
+        raise ValueError('Too many levels for values up to ' +
+                         str(MAX_VALUE))
+    att_number = exp_conf[ARI] + 1 + exp_conf[IND]
+    if att_number > exp_conf[ATT]:
+        raise ValueError('Rules with ' + str(exp_conf[ARI]) +
+                         ' condition and ' + str(exp_conf[IND]) +
+                         ' indifferent attributes require at least ' +
+                         str(att_number) + ' attributes (' +
+                         str(exp_conf[ATT]) + ' given)')
+
+
+def gen_rule_dicts(exp_conf):
+    '''
+    Generate preference rules as dictionaries. Each condition context
+    receives a chain of LEV preferences (1 > 2, 2 > 3, ...). When all
+    contexts have been used, contexts are visited again with chains over
+    LEV + 1 random values (seeded by the query ID). Preferences repeating
+    or contradicting earlier rules of the context are rejected by its
+    preference graph and skipped
+    '''
+    check_rule_attributes(exp_conf)
+    arity = exp_conf[ARI]
+    level = exp_conf[LEV]
+    # Build list of indifferent attributes
+    indiff_str = ''
+    if exp_conf[IND] > 0:
+        # Indifferent attributes start after the preferred attribute
+        indiff_str = '[' + ', '.join('A' + str(att + arity + 2)
+                                     for att in range(exp_conf[IND])) + ']'
+    # Preference graphs by condition context
+    graph_dict = {}
+    # Build rules list
+    rules_list = []
+    # Chains of the first pass (the same for every context)
+    value_list = range(1, level + 2)
+    # Random chains of later passes do not depend on the global generator
+    rand = random.Random(get_table_seed(get_query_id(exp_conf)))
+    value_range = range(1, MAX_VALUE + 1)
+    first_pass = True
+    # Rules added in the current pass over contexts
+    pass_count = 0
+    context_iter = gen_contexts(arity)
+    while len(rules_list) < exp_conf[RUL]:
+        context = next(context_iter, None)
+        if context is None:
+            # Graphs are saturated when a whole pass adds no rule
+            if pass_count == 0:
+                raise ValueError('Too many rules for ' + str(arity) +
+                                 ' condition attributes and values up to ' +
+                                 str(MAX_VALUE))
+            # All contexts used, start a new pass with random chains
+            first_pass = False
+            pass_count = 0
+            context_iter = gen_contexts(arity)
+            continue
+        if not first_pass:
+            value_list = rand.sample(value_range, level + 1)
+        graph = graph_dict.setdefault(context, PreferenceGraph())
+        for better, worse in zip(value_list, value_list[1:]):
+            if len(rules_list) == exp_conf[RUL]:
+                break
+            # Repeated or cyclic preference
+            if not graph.add_preference(better, worse):
+                continue
+            rules_list.append({'COND': context, 'BEST': better,
+                               'WORST': worse, 'INDIFF': indiff_str})
+            pass_count += 1
+    return rules_list
+
+
+def gen_rules(exp_conf):
+    '''
+    Generate preference rules
+    '''
+    # Condition strings are built once per context
+    condition_dict = {}
+    rules_list = []
+    for rule_dict in gen_rule_dicts(exp_conf):
+        condition_str = condition_dict.get(rule_dict['COND'])
+        if condition_str is None:
+            condition_str = get_condition_string(rule_dict['COND'])
+            condition_dict[rule_dict['COND']] = condition_str
+        rules_list.append(gen_rule(rule_dict, condition_str))
+    return rules_list
+
+
+def get_rule_index(exp_conf):
+    '''
+    Return index of preference rules used to generate matching tuples:
+    list of distinct (condition values..., best value, worst value)
+    (empty if selectivity is zero)
+    '''
+    if exp_conf[SEL] <= 0:
+        return []
+    return get_unique_list([rule_dict['COND'] +
+                            (rule_dict['BEST'], rule_dict['WORST'])
+                            for rule_dict in gen_rule_dicts(exp_conf)],
+                           lambda entry: entry)
+
+
+def gen_query(exp_conf):
+    '''
+    Generate a preference query and return its manifest entry
+    as (filename, entry)
+    '''
+    filename = get_query_file(exp_conf)
+    rules_list = gen_rules(exp_conf)
+    pref = '\nAND\n'.join(rules_list)
+    topk = ''
+    if exp_conf[TOP] != -1:
+        topk = 'TOP(' + str(exp_conf[TOP]) + ')'
+    query = QUERY.format(t=topk, p=pref)
+    out_file = open(get_partial_file(filename), 'w')
+    out_file.write(query)
+    commit_file(out_file, filename)
+    inputs_hash = get_inputs_hash(get_query_inputs(exp_conf))
+    return (filename, get_manifest_entry(filename, inputs_hash))
+
+
+def gen_all_queries(experiment_list, jobs=1, manifest=None):
+    '''
+    Generate all queries
+    '''
+    if manifest is None:
+        manifest = {}
+    gen_all_files(experiment_list, jobs, manifest,
+                  (get_query_id, get_query_file, get_query_inputs, gen_query),
+                  'queries')
+
+
+def gen_env_file(exp_conf):
+    '''
+    Generate environment files for StremPref and return its manifest entry
+    as (filename, entry)
+    '''
+    table_id = get_table_id(exp_conf)
+    query_id = get_query_id(exp_conf)
+    att_list = ['a' + str(number + 1) + ' INTEGER'
+                for number in range(exp_conf[ATT])]
+    att_str = ', '.join(att_list)
+    text = "REGISTER TABLE r ({att}) \nINPUT '{ddir}/{tab}.{ext}';"\
+        .format(att=att_str, ddir=DATA_DIR, tab=table_id, ext=TABLE_FORMAT)
+    text += '\n\n' + '#' * 80 + '\n\n'
+    text += "REGISTER QUERY q \nINPUT '{qdir}/{que}.cql';"\
+        .format(qdir=QUERIES_DIR, que=query_id)
+    filename = get_env_file(exp_conf)
+    out_file = open(get_partial_file(filename), 'w')
+    out_file.write(text)
+    commit_file(out_file, filename)
+    inputs_hash = get_inputs_hash(get_env_inputs(exp_conf))
+    return (filename, get_manifest_entry(filename, inputs_hash))
+
+
+class Experiment(dict):
+    '''
+    Frozen (read-only and hashable) experiment configuration
+    '''
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.items())))
+
+    def __reduce__(self):
+        return (Experiment, (dict(self),))
+
+    def _read_only(self, *_args, **_kwargs):
+        raise TypeError('Experiment configuration is read-only')
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+
+def get_default_plan():
+    '''
+    Return the default experiment plan (built from parameter lists)
+    '''
+    # Default parameters
+    def_rec = {ATT: ATTRIBUTE_DEFAULT, TUP: TUPLE_DEFAULT,
+               DEL: DELETION_DEFAULT, INS: INSERTION_DEFAULT,
+               RUL: RULE_DEFAULT, LEV: LEVEL_DEFAULT, IND: INDIFF_DEFAULT,
+               TOP: TOPK_DEFAULT, SEL: SELECTIVITY_DEFAULT,
+               DIS: DISTRIBUTION_DEFAULT, ARI: ARITY_DEFAULT}
+    # Every variation is also run without deletions and without insertions
+    variants = [{}, {DEL: 0}, {INS: 0}]
+    # Attributes and tuples number variation
+    sweep1 = {SWEEP_TYPE: OFAT,
+              SWEEP_PARAMETERS: OrderedDict([(ATT, ATTRIBUTE_LIST),
+                                             (TUP, TUPLE_LIST)]),
+              SWEEP_VARIANTS: variants}
+    # Deletions number variation (with maximum number of tuples)
+    sweep2 = {SWEEP_TYPE: OFAT,
+              PLAN_DEFAULT: {TUP: TUPLE_MAX},
+              SWEEP_PARAMETERS: OrderedDict([(DEL, DELETION_LIST)]),
+              SWEEP_VARIANTS: variants}
+    # Insertions, rules, levels, indifferent attributes and top-k variation
+    sweep3 = {SWEEP_TYPE: OFAT,
+              SWEEP_PARAMETERS: OrderedDict([(INS, INSERTION_LIST),
+                                             (RUL, RULE_LIST),
+                                             (LEV, LEVEL_LIST),
+                                             (IND, INDIFF_LIST),
+                                             (TOP, TOPK_LIST)]),
+              SWEEP_VARIANTS: variants}
+    return {PLAN_DEFAULT: def_rec, PLAN_SWEEPS: [sweep1, sweep2, sweep3]}
+
+
+def check_parameters(param_dict):
+    '''
+    Check if all keys of a dictionary are experiment parameters
+    '''
+    for key in param_dict:
+        if key not in PARAMETER_LIST:
+            raise ValueError('Invalid experiment parameter: ' + str(key))
+    # Distributions (single value or list of sweep values)
+    if DIS in param_dict:
+        value_list = param_dict[DIS]
+        if not isinstance(value_list, list):
+            value_list = [value_list]
+        for value in value_list:
+            get_distribution(value)
+
+
+def get_plan(filename=None):
+    '''
+    Return experiment plan from a JSON file (default plan if no file)
+    '''
+    plan = get_default_plan()
+    if filename is None:
+        return plan
+    in_file = open(filename, 'r')
+    file_plan = json.load(in_file, object_pairs_hook=OrderedDict)
+    in_file.close()
+    # Parameters not given in the file keep their default values
+    check_parameters(file_plan.get(PLAN_DEFAULT, {}))
+    plan[PLAN_DEFAULT].update(file_plan.get(PLAN_DEFAULT, {}))
+    if PLAN_SWEEPS in file_plan:
+        plan[PLAN_SWEEPS] = file_plan[PLAN_SWEEPS]
+    for sweep in plan[PLAN_SWEEPS]:
+        if sweep.get(SWEEP_TYPE) not in [OFAT, GRID, RANDOM]:
+            raise ValueError('Invalid sweep type: ' +
+                             str(sweep.get(SWEEP_TYPE)))
+        check_parameters(sweep.get(PLAN_DEFAULT, {}))
+        check_parameters(sweep[SWEEP_PARAMETERS])
+        for variant in sweep.get(SWEEP_VARIANTS, [{}]):
+            check_parameters(variant)
+    return plan
+
+
+def get_sweep_default(plan, sweep):
+    '''
+    Return default parameters of a sweep
+    '''
+    def_rec = plan[PLAN_DEFAULT].copy()
+    def_rec.update(sweep.get(PLAN_DEFAULT, {}))
+    return def_rec
+
+
+def gen_sweep_points(sweep):
+    '''
+    Generate the parameter assignments of a sweep as dictionaries
+    '''
+    param_dict = sweep[SWEEP_PARAMETERS]
+    key_list = list(param_dict.keys())
+    if sweep[SWEEP_TYPE] == OFAT:
+        for key in key_list:
+            for value in param_dict[key]:
+                yield {key: value}
+    elif sweep[SWEEP_TYPE] == GRID:
+        for value_list in itertools.product(*[param_dict[key]
+                                              for key in key_list]):
+            yield dict(zip(key_list, value_list))
+    else:
+        # Use own generator to keep plan independent from other random data
+        rand = random.Random(sweep.get(SWEEP_SEED, SEED))
+        for _ in xrange(sweep[SWEEP_SAMPLES]):
+            yield {key: rand.choice(param_dict[key]) for key in key_list}
+
+
+def gen_sweep_experiments(plan, sweep):
+    '''
+    Generate experiments of a sweep.
+    Variants setting a parameter varied by the sweep are skipped
+    '''
+    def_rec = get_sweep_default(plan, sweep)
+    for point in gen_sweep_points(sweep):
+        for variant in sweep.get(SWEEP_VARIANTS, [{}]):
+            if any(key in point for key in variant):
+                continue
+            rec = def_rec.copy()
+            rec.update(point)
+            rec.update(variant)
+            yield Experiment(rec)
+
+
+def add_experiment(experiment_list, experiment_set, experiment):
+    '''
+    Add an experiment into experiment list (if it is not in the list)
+    '''
+    if experiment not in experiment_set:
+        # Queries are shared by tables with any number of attributes
+        check_rule_attributes(experiment)
+        experiment_set.add(experiment)
+        experiment_list.append(experiment)
+
+
+def gen_experiment_list(plan=None):
+    '''
+    Generate the list of experiments of a plan
+    '''
+    if plan is None:
+        plan = get_default_plan()
+    exp_list = []
+    exp_set = set()
+    for sweep in plan[PLAN_SWEEPS]:
+        for exp_rec in gen_sweep_experiments(plan, sweep):
+            add_experiment(exp_list, exp_set, exp_rec)
+    return exp_list
+
+
+def parse_filters(filter_list):
+    '''
+    Parse experiment filters given as strings KEY=VALUE[,VALUE...].
+    Return a dictionary of allowed values by parameter
+    '''
+    filter_dict = OrderedDict()
+    for filter_str in filter_list:
+        if '=' not in filter_str:
+            raise ValueError('Invalid filter (KEY=VALUE expected): ' +
+                             filter_str)
+        key, value_str = filter_str.split('=', 1)
+        value_list = value_str.split(',')
+        if key != DIS:
+            try:
+                value_list = [int(value) for value in value_list]
+            except ValueError:
+                raise ValueError('Invalid filter value: ' + filter_str)
+        filter_dict.setdefault(key, []).extend(value_list)
+    check_parameters(filter_dict)
+    return filter_dict
+
+
+def match_filters(exp_rec, filter_dict):
+    '''
+    Check if an experiment has allowed values for all filtered parameters
+    '''
+    return all(exp_rec[key] in value_list
+               for key, value_list in filter_dict.items())
+
+
+def filter_experiments(experiment_list, filter_dict):
+    '''
+    Return experiments matching filters
+    '''
+    return [exp_rec for exp_rec in experiment_list
+            if match_filters(exp_rec, filter_dict)]
+
+
+def filter_summaries(summary_list, filter_dict):
+    '''
+    Restrict the values of summaries (tuples (key, value list, default
+    experiment)) to the experiments matching filters.
+    Summaries without values are removed
+    '''
+    result_list = []
+    for key, value_list, def_rec in summary_list:
+        exp_rec = def_rec.copy()
+        match_list = []
+        for value in value_list:
+            exp_rec[key] = value
+            if match_filters(exp_rec, filter_dict):
+                match_list.append(value)
+        if match_list:
+            result_list.append((key, match_list, def_rec))
+    return result_list
+
+
+def get_selection_suffix(filter_dict, algorithm_list=ALGORITHM_LIST,
+                         run_limit=None):
+    '''
+    Get suffix of summary and result files of a selection of results
+    (filters, algorithms and maximum number of runs), so they do not
+    replace the files of all results (empty suffix)
+    '''
+    part_list = [key + '-'.join(str(value) for value in value_list)
+                 for key, value_list in filter_dict.items()]
+    if algorithm_list != ALGORITHM_LIST:
+        part_list.extend(algorithm_list)
+    if run_limit is not None:
+        part_list.append('runs' + str(run_limit))
+    if not part_list:
+        return ''
+    return '_only_' + '_'.join(part_list)
+
+
+def get_summary_list(plan):
+    '''
+    Return the summaries of a plan as tuples (key, value list, default
+    experiment). Only one-factor-at-a-time sweeps are summarized
+    '''
+    summary_list = []
+    for sweep in plan[PLAN_SWEEPS]:
+        if sweep[SWEEP_TYPE] != OFAT:
+            continue
+        def_rec = get_sweep_default(plan, sweep)
+        for key, value_list in sweep[SWEEP_PARAMETERS].items():
+            for variant in sweep.get(SWEEP_VARIANTS, [{}]):
+                if key in variant:
+                    continue
+                rec = def_rec.copy()
+                rec.update(variant)
+                summary_list.append((key, value_list, rec))
+    return summary_list
+
+
+def gen_all_env_files(experiment_list, jobs=1, manifest=None):
+    '''
+    Generate all environment files
+    '''
+    if manifest is None:
+        manifest = {}
+    gen_all_files(experiment_list, jobs, manifest,
+                  (get_experiment_id, get_env_file, get_env_inputs,
+                   gen_env_file),
+                  'environments')
+
+
+def open_stream_target(target):
+    '''
+    Open target of stream mode ('fifo:PATH', 'unix:PATH' or 'tcp:PORT' on
+    localhost) and wait for a reader. Return (file descriptor, list of
+    objects to close)
+    '''
+    kind, _, address = target.partition(':')
+    if kind == 'fifo':
+        if not os.path.exists(address):
+            os.mkfifo(address)
+        # Opening blocks until the reader opens the FIFO
+        out_fd = os.open(address, os.O_WRONLY)
+        return (out_fd, [])
+    if kind == 'unix':
+        if os.path.exists(address):
+            os.remove(address)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(address)
+    elif kind == 'tcp':
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(('127.0.0.1', int(address)))
+    else:
+        raise ValueError('Invalid stream target: ' + target)
+    server.listen(1)
+    connection, _ = server.accept()
+    return (connection.fileno(), [connection, server])
+
+
+def get_due_time(start, tuple_number, rate):
+    '''
+    Get time when tuple number tuple_number must be sent at a given rate
+    '''
+    if rate <= 0:
+        return start
+    return start + float(tuple_number) / rate
+
+
+def serve_stream(exp_conf, target, rate=SERVE_RATE, iteration_number=0):
+    '''
+    Generate the table of an experiment on the fly and send it (CSV) to
+    a stream target at rate tuples per second. Batches (instants) are
+    generated when they are due and while less than SERVE_BUFFER_SIZE bytes
+    wait for the reader (backpressure). The achieved rate and the lag (how
+    late the oldest waiting batch is) are reported every
+    SERVE_REPORT_INTERVAL seconds
+    '''
+    writer = BufferTableWriter(target, exp_conf[ATT])
+    batch_iter = gen_table_batches(exp_conf, iteration_number)
+    print 'Waiting for reader on ' + target
+    out_fd, close_list = open_stream_target(target)
+    flags = fcntl.fcntl(out_fd, fcntl.F_GETFL)
+    fcntl.fcntl(out_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+    # Batches waiting for the reader (data, tuples number, due time)
+    pending = deque()
+    # Bytes waiting and bytes of first batch already written
+    buffered = 0
+    offset = 0
+    # Tuples generated and sent
+    queued = 0
+    sent = 0
+    finished = False
+    start = time.time()
+    report_time = start + SERVE_REPORT_INTERVAL
+    window_start = start
+    window_sent = 0
+    max_lag = 0.0
+    try:
+        while not finished or pending:
+            now = time.time()
+            # Generate due batches while there is space in the buffer
+            while not finished and buffered < SERVE_BUFFER_SIZE and \
+                    get_due_time(start, queued, rate) <= now:
+                batch = next(batch_iter, None)
+                if batch is None:
+                    finished = True
+                    break
+                due_time = get_due_time(start, queued, rate)
+                writer.write(*batch)
+                data = writer.take()
+                queued += len(batch[2])
+                if data:
+                    pending.append((data, len(batch[2]), due_time))
+                    buffered += len(data)
+            if pending:
+                max_lag = max(max_lag, now - pending[0][2])
+            if now >= report_time:
+                print 'Sent ' + str(sent) + ' tuples, rate ' + \
+                    str(round(window_sent / (now - window_start), 1)) + \
+                    ' tuples/s (target ' + str(rate) + '), lag ' + \
+                    str(round(max_lag, 3)) + 's, buffered ' + \
+                    str(buffered) + ' bytes'
+                report_time = now + SERVE_REPORT_INTERVAL
+                window_start = now
+                window_sent = 0
+                max_lag = 0.0
+            # Wait until the reader accepts data or the next batch is due
+            wait_time = report_time
+            if not finished and buffered < SERVE_BUFFER_SIZE:
+                wait_time = min(wait_time, get_due_time(start, queued, rate))
+            timeout = max(wait_time - now, 0)
+            if not pending:
+                time.sleep(timeout)
+                continue
+            _, writable, _ = select.select([], [out_fd], [], timeout)
+            if not writable:
+                continue
+            data, count, _ = pending[0]
+            written = os.write(out_fd, data[offset:offset + SERVE_CHUNK_SIZE])
+            offset += written
+            buffered -= written
+            if offset == len(data):
+                pending.popleft()
+                offset = 0
+                sent += count
+                window_sent += count
+    except (OSError, IOError, socket.error) as exc:
+        if exc.errno not in [errno.EPIPE, errno.ECONNRESET]:
+            raise
+        print 'Reader disconnected'
+    except KeyboardInterrupt:
+        print 'Interrupted'
+    finally:
+        # Sockets close their own file descriptor
+        if not close_list:
+            os.close(out_fd)
+        for obj in close_list:
+            obj.close()
+    elapsed = time.time() - start
+    print 'Total: ' + str(sent) + ' tuples in ' + str(round(elapsed, 1)) + \
+        's (' + str(round(sent / max(elapsed, 1e-9), 1)) + ' tuples/s)'
+
+
+def parse_query(filename):
+    '''
+    Parse a query file. Return (rules, top-k) where each rule is a tuple
+    (conditions as ((attribute, value), ...), preferred attribute,
+    better value, worse value, indifferent attributes). Attributes are
+    positions in records (A1 is 0) and top-k is -1 for the best operator
+    '''
+    in_file = open(filename, 'r')
+    text = in_file.read()
+    in_file.close()
+    rule_list = []
+    for match in RULE_PATTERN.finditer(text):
+        cond_list = tuple((int(att) - 1, int(value)) for att, value in
+                          CONDITION_PATTERN.findall(match.group('cond')))
+        indiff_list = ()
+        if match.group('ind'):
+            indiff_list = tuple(int(att.strip()[1:]) - 1 for att in
+                                match.group('ind').split(','))
+        rule_list.append((cond_list, int(match.group('att')) - 1,
+                          int(match.group('b')), int(match.group('w')),
+                          indiff_list))
+    topk = -1
+    match = TOPK_PATTERN.search(text)
+    if match:
+        topk = int(match.group(1))
+    return (rule_list, topk)
+
+
+class OracleEvaluator(object):
+    '''
+    Reference evaluator of BEST and TOP(k) preference queries over
+    a stream of insertions and deletions.
+    Dominance follows the ceteris paribus semantics of the rules: a record
+    dominates another if the latter can be reached by applying rules
+    (changing the preferred attribute from the better to the worse value
+    and freeing the indifferent attributes) with conditions satisfied at
+    every step. Attributes never changed by a rule must be equal, so live
+    records are partitioned by these attributes and a batch is only tested
+    against its partitions (dominance tests are memoized on the attributes
+    used by the rules). The dominance graph of the live records and the
+    BEST answer are maintained incrementally (TOP(k) is computed from the
+    graph at every instant)
+    '''
+
+    def __init__(self, rule_list, topk, att_number):
+        self.rule_list = rule_list
+        self.topk = topk
+        changed_set = set()
+        used_set = set()
+        for cond_list, att, _, _, indiff_list in rule_list:
+            changed_set.add(att)
+            changed_set.update(indiff_list)
+            used_set.update(cond_att for cond_att, _ in cond_list)
+        used_set.update(changed_set)
+        # Attributes never changed (partition key) and used by rules
+        # (attributes missing in the table are free values)
+        self.fixed_list = [att for att in range(att_number)
+                           if att not in changed_set]
+        self.used_list = sorted(att for att in used_set if att < att_number)
+        self.state_size = max(used_set) + 1 if used_set else 0
+        # Live records by ID and IDs by record (records may repeat)
+        self.record_dict = {}
+        self.id_dict = {}
+        # Live record IDs by partition key
+        self.partition_dict = {}
+        # Dominance graph (dominators and dominated IDs by ID)
+        self.better_dict = {}
+        self.worse_dict = {}
+        self.next_id = 0
+        self.memo_dict = {}
+        # IDs of BEST answer and its changes since last instant
+        # (records by ID)
+        self.best_set = set()
+        self.added_dict = {}
+        self.removed_dict = {}
+        # Last TOP(k) answer
+        self.answer = Counter()
+
+    def add_best(self, rec_id):
+        '''
+        Add record to BEST answer
+        '''
+        self.best_set.add(rec_id)
+        if self.removed_dict.pop(rec_id, None) is None:
+            self.added_dict[rec_id] = self.record_dict[rec_id]
+
+    def remove_best(self, rec_id):
+        '''
+        Remove record from BEST answer
+        '''
+        self.best_set.remove(rec_id)
+        if self.added_dict.pop(rec_id, None) is None:
+            self.removed_dict[rec_id] = self.record_dict[rec_id]
+
+    def get_key(self, record):
+        '''
+        Get partition key of a record
+        '''
+        return tuple(record[att] for att in self.fixed_list)
+
+    def get_used(self, record):
+        '''
+        Get values of attributes used by rules (None for others)
+        '''
+        used = [None] * self.state_size
+        for att in self.used_list:
+            used[att] = record[att]
+        return tuple(used)
+
+    def search(self, source, target):
+        '''
+        Check if target values are reachable from source values by
+        applying at least one rule (None is a free value)
+        '''
+        visited_set = set()
+        stack = [source]
+        while stack:
+            state = stack.pop()
+            for cond_list, att, better, worse, indiff_list in \
+                    self.rule_list:
+                if state[att] not in (better, None):
+                    continue
+                if any(state[cond_att] not in (value, None)
+                       for cond_att, value in cond_list):
+                    continue
+                new_state = list(state)
+                for cond_att, value in cond_list:
+                    new_state[cond_att] = value
+                new_state[att] = worse
+                for indiff_att in indiff_list:
+                    new_state[indiff_att] = None
+                new_state = tuple(new_state)
+                if new_state in visited_set:
+                    continue
+                visited_set.add(new_state)
+                if all(value is None or value == target[pos]
+                       for pos, value in enumerate(new_state)):
+                    return True
+                stack.append(new_state)
+        return False
+
+    def dominates(self, record, other):
+        '''
+        Check if record dominates other (same partition)
+        '''
+        key = (self.get_used(record), self.get_used(other))
+        result = self.memo_dict.get(key)
+        if result is None:
+            result = key[0] != key[1] and self.search(*key)
+            self.memo_dict[key] = result
+        return result
+
+    def insert(self, record_list):
+        '''
+        Insert a batch of records
+        '''
+        # Group batch by partition (one pass over each partition)
+        batch_dict = {}
+        for record in record_list:
+            batch_dict.setdefault(self.get_key(record), []).append(record)
+        for key, batch_list in batch_dict.items():
+            partition = self.partition_dict.setdefault(key, set())
+            for record in batch_list:
+                rec_id = self.next_id
+                self.next_id += 1
+                better_set = set()
+                worse_set = set()
+                for other_id in partition:
+                    other = self.record_dict[other_id]
+                    if self.dominates(other, record):
+                        better_set.add(other_id)
+                        self.worse_dict[other_id].add(rec_id)
+                    elif self.dominates(record, other):
+                        worse_set.add(other_id)
+                        if other_id in self.best_set:
+                            self.remove_best(other_id)
+                        self.better_dict[other_id].add(rec_id)
+                self.better_dict[rec_id] = better_set
+                self.worse_dict[rec_id] = worse_set
+                self.record_dict[rec_id] = record
+                self.id_dict.setdefault(record, []).append(rec_id)
+                partition.add(rec_id)
+                if not better_set:
+                    self.add_best(rec_id)
+
+    def delete(self, record_list):
+        '''
+        Delete a batch of records
+        '''
+        for record in record_list:
+            id_list = self.id_dict.get(record)
+            if not id_list:
+                raise ValueError('Deleted record not found: ' + str(record))
+            rec_id = id_list.pop()
+            if not id_list:
+                del self.id_dict[record]
+            if rec_id in self.best_set:
+                self.remove_best(rec_id)
+            del self.record_dict[rec_id]
+            self.partition_dict[self.get_key(record)].discard(rec_id)
+            for other_id in self.better_dict.pop(rec_id):
+                self.worse_dict[other_id].discard(rec_id)
+            for other_id in self.worse_dict.pop(rec_id):
+                better_set = self.better_dict[other_id]
+                better_set.discard(rec_id)
+                if not better_set:
+                    self.add_best(other_id)
+
+    def get_answer(self):
+        '''
+        Get answer (list of records) of BEST or TOP(k) operator.
+        TOP(k) returns the k records with lowest levels (longest chain of
+        dominators), ties broken by arrival order
+        '''
+        if self.topk == -1:
+            return [self.record_dict[rec_id] for rec_id in self.best_set]
+        # Levels in topological order of dominance graph
+        level_dict = {}
+        count_dict = {rec_id: len(better_set)
+                      for rec_id, better_set in self.better_dict.items()}
+        current_list = [rec_id for rec_id, count in count_dict.items()
+                        if count == 0]
+        level = 0
+        while current_list:
+            next_list = []
+            for rec_id in current_list:
+                level_dict[rec_id] = level
+                for other_id in self.worse_dict[rec_id]:
+                    count_dict[other_id] -= 1
+                    if count_dict[other_id] == 0:
+                        next_list.append(other_id)
+            current_list = next_list
+            level += 1
+        id_list = sorted(level_dict,
+                         key=lambda rec_id: (level_dict[rec_id], rec_id))
+        return [self.record_dict[rec_id] for rec_id in id_list[:self.topk]]
+
+    def take_changes(self):
+        '''
+        Return changes of the answer since last call as
+        (removed records, added records)
+        '''
+        if self.topk == -1:
+            removed = Counter(self.removed_dict.values())
+            added = Counter(self.added_dict.values())
+            self.removed_dict = {}
+            self.added_dict = {}
+        else:
+            answer = Counter(self.get_answer())
+            removed = self.answer - answer
+            added = answer - self.answer
+            self.answer = answer
+        # Same record removed and added (repeated records) is not a change
+        common = removed & added
+        return (sorted((removed - common).elements()),
+                sorted((added - common).elements()))
+
+
+def write_answer_changes(writer, timestamp, evaluator):
+    '''
+    Write changes of the answer of an evaluator at an instant
+    '''
+    removed_list, added_list = evaluator.take_changes()
+    writer.write(timestamp, '-', removed_list)
+    writer.write(timestamp, '+', added_list)
+
+
+def evaluate_oracle(exp_conf):
+    '''
+    Evaluate the query of an experiment over its table with the reference
+    evaluator. The answer is stored in ORACLE_DIR as a table of changes
+    (insertions and deletions of answer records at every instant).
+    Return (experiment ID, elapsed time)
+    '''
+    start = time.time()
+    rule_list, topk = parse_query(get_query_file(exp_conf))
+    att_number, batch_iter = read_table(get_table_file(exp_conf))
+    evaluator = OracleEvaluator(rule_list, topk, att_number)
+    filename = get_oracle_file(exp_conf)
+    writer = TableWriter(filename, att_number)
+    current_ts = None
+    for timestamp, operation, record_list in batch_iter:
+        if current_ts is not None and timestamp != current_ts:
+            write_answer_changes(writer, current_ts, evaluator)
+        current_ts = timestamp
+        if operation == '+':
+            evaluator.insert(record_list)
+        else:
+            evaluator.delete(record_list)
+    if current_ts is not None:
+        write_answer_changes(writer, current_ts, evaluator)
+    writer.close()
+    return (get_experiment_id(exp_conf), time.time() - start)
+
+
+def get_oracle_file(exp_conf):
+    '''
+    Get filename of oracle answer of an experiment
+    '''
+    return ORACLE_DIR + os.sep + get_experiment_id(exp_conf) + '.csv'
+
+
+def evaluate_oracle_all(experiment_list, jobs=1):
+    '''
+    Evaluate all experiments with the reference evaluator
+    '''
+    exp_list = get_unique_list(experiment_list, get_experiment_id)
+    for exp_id, elapsed in run_jobs(evaluate_oracle, exp_list, jobs,
+                                    'oracle answers'):
+        print exp_id + ': ' + str(round(elapsed, 3)) + 's'
+
+
+def read_answers(filename):
+    '''
+    Read answer changes of a file (table format). Return dictionary of
+    answers (Counter of records) by instant
+    '''
+    _, batch_iter = read_table(filename)
+    answer = Counter()
+    answer_dict = OrderedDict()
+    for timestamp, operation, record_list in batch_iter:
+        if operation == '+':
+            answer.update(record_list)
+        else:
+            answer.subtract(record_list)
+            answer += Counter()
+        answer_dict[timestamp] = answer.copy()
+    return answer_dict
+
+
+def diff_answers(expected_file, actual_file):
+    '''
+    Compare answers of two files (e.g. oracle and StreamPref output) at every
+    instant. Return number of instants with different answers
+    '''
+    expected_dict = read_answers(expected_file)
+    actual_dict = read_answers(actual_file)
+    expected = Counter()
+    actual = Counter()
+    diff_count = 0
+    for timestamp in sorted(set(expected_dict) | set(actual_dict)):
+        # Answers are kept until changed
+        expected = expected_dict.get(timestamp, expected)
+        actual = actual_dict.get(timestamp, actual)
+        if expected != actual:
+            diff_count += 1
+            print 'Instant ' + str(timestamp) + ': ' + \
+                str(sum((expected - actual).values())) + ' missing, ' + \
+                str(sum((actual - expected).values())) + ' unexpected'
+            for record in sorted((expected - actual).elements())[:3]:
+                print '  missing ' + str(record)
+            for record in sorted((actual - expected).elements())[:3]:
+                print '  unexpected ' + str(record)
+    if diff_count:
+        print 'Answers differ in ' + str(diff_count) + ' instants'
+    else:
+        print 'Answers match'
+    return diff_count
+
+
+def create_directories():
+    '''
+    Create directories
+    '''
+    for directory in DIR_LIST:
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+
+def get_detail_file(algorithm, experiment_id, count):
+    '''
+    Get filename for experiment details
+    '''
+    return DETAILS_DIR + os.sep + algorithm + '-' + \
+        experiment_id + '.' + str(count) + '.csv'
+
+
+def get_run_command(algorithm, experiment_id, detail_file):
+    '''
+    Get command to run an experiment
+    '''
+    return RUN_COMMAND.format(alg=algorithm, id=experiment_id,
+                              det=detail_file, max=ITERATION_DEFAULT)
+
+
+def check_detail_file(detail_file):
+    '''
+    Check if detail file was created by an experiment run
+    '''
+    if not os.path.isfile(detail_file):
+        print 'Detail results file not found: ' + detail_file
+        print "Check if 'streampref' is in path"
+
+
+def get_resource_file(detail_file):
+    '''
+    Get filename of resource file of a detail file
+    '''
+    return detail_file[:-len('.csv')] + RESOURCE_SUFFIX
+
+
+def read_proc_memory(pid):
+    '''
+    Read resident memory (VmRSS, in kB) of a process from /proc
+    (None if not available)
+    '''
+    try:
+        in_file = open('/proc/' + str(pid) + '/status', 'r')
+    except IOError:
+        return None
+    rss = None
+    for line in in_file:
+        if line.startswith('VmRSS:'):
+            rss = int(line.split()[1])
+            break
+    in_file.close()
+    return rss
+
+
+class ManagedRun(object):
+    '''
+    Experiment process with resource accounting. The command must write
+    the temporary file of the detail file. The process resident memory is
+    sampled (from /proc) while it runs and the process is killed if it
+    exceeds the wall-clock limit (timeout, seconds) or the memory limit
+    (MB). The memory limit is also a hard limit of the address space of
+    the process (RLIMIT_AS), so peaks between samples fail the run too.
+    If the run succeeds (exit status 0 and valid detail file), its
+    resource usage (os.wait4) is stored in the resource file and the
+    temporary file is renamed to the detail file. Otherwise the temporary
+    file is removed and the failure reason is kept
+    '''
+
+    def __init__(self, command, detail_file, core=None,
+                 sample_interval=SAMPLE_INTERVAL, timeout=RUN_TIMEOUT,
+                 memory_limit=MEMORY_LIMIT):
+        self.detail_file = detail_file
+        self.sample_interval = sample_interval
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.reason = None
+        self.resource_dict = None
+        argument_list = shlex.split(command)
+        # Functions called in the child process before the command
+        setup_list = []
+        if core is not None:
+            if hasattr(os, 'sched_setaffinity'):
+                setup_list.append(lambda: os.sched_setaffinity(0, [core]))
+            elif find_executable('taskset') is not None:
+                argument_list = \
+                    shlex.split(TASKSET_COMMAND.format(core=core)) + \
+                    argument_list
+        if memory_limit:
+            limit = memory_limit * 1024 * 1024
+            setup_list.append(lambda: resource.setrlimit(resource.RLIMIT_AS,
+                                                         (limit, limit)))
+        preexec_fn = None
+        if setup_list:
+            preexec_fn = lambda: [setup() for setup in setup_list]
+        self.start = time.time()
+        self.next_sample = self.start
+        self.timeline = []
+        self.proc = subprocess.Popen(argument_list, preexec_fn=preexec_fn)
+
+    def poll(self):
+        '''
+        Sample memory of process (if sample interval has passed) and check
+        if it has finished (storing its resources)
+        '''
+        pid, status, rusage = os.wait4(self.proc.pid, os.WNOHANG)
+        now = time.time()
+        if pid == 0:
+            if now >= self.next_sample:
+                rss = read_proc_memory(self.proc.pid)
+                if rss is not None:
+                    self.timeline.append((round(now - self.start, 3), rss))
+                    if self.memory_limit and \
+                            rss > self.memory_limit * 1024:
+                        self.kill('memory limit (' + str(rss) + ' kB)')
+                self.next_sample = now + self.sample_interval
+            if self.timeout and now - self.start > self.timeout:
+                self.kill('timeout (' + str(self.timeout) + 's)')
+            return False
+        # Process was reaped by os.wait4 (negative status for signals)
+        if os.WIFSIGNALED(status):
+            status = -os.WTERMSIG(status)
+        else:
+            status = os.WEXITSTATUS(status)
+        self.proc.returncode = status
+        resource_dict = {WALL_TIME: now - self.start,
+                         USER_TIME: rusage.ru_utime,
+                         SYS_TIME: rusage.ru_stime,
+                         MAX_RSS: rusage.ru_maxrss,
+                         VOLUNTARY_SWITCHES: rusage.ru_nvcsw,
+                         INVOLUNTARY_SWITCHES: rusage.ru_nivcsw,
+                         EXIT_STATUS: status,
+                         TIMELINE: self.timeline}
+        self.resource_dict = resource_dict
+        temp_file = get_temp_file(self.detail_file)
+        if self.reason is None and status != 0:
+            self.reason = 'exit status ' + str(status)
+        if self.reason is None and not is_valid_detail_file(temp_file):
+            self.reason = 'invalid detail file'
+        if self.reason is not None:
+            print 'Run failed (' + self.reason + '): ' + self.detail_file
+            remove_file(temp_file)
+            return True
+        resource_file = get_resource_file(self.detail_file)
+        out_file = open(get_temp_file(resource_file), 'w')
+        json.dump(resource_dict, out_file)
+        commit_file(out_file, resource_file)
+        commit_file(open(temp_file, 'a'), self.detail_file)
+        return True
+
+    def kill(self, reason):
+        '''
+        Kill process (the run fails for the given reason)
+        '''
+        if self.reason is None:
+            self.reason = reason
+            try:
+                self.proc.kill()
+            except OSError:
+                pass
+
+    def succeeded(self):
+        '''
+        Check if run has finished successfully
+        '''
+        return self.proc.returncode is not None and self.reason is None
+
+
+def get_temp_file(filename):
+    '''
+    Get temporary filename used while a file is written
+    '''
+    return filename + TEMP_SUFFIX
+
+
+def remove_file(filename):
+    '''
+    Remove a file if it exists
+    '''
+    if os.path.isfile(filename):
+        os.remove(filename)
+
+
+def commit_file(out_file, filename):
+    '''
+    Flush a temporary file (opened for writing) to disk, close it and
+    rename it to filename (atomic replacement)
+    '''
+    out_file.flush()
+    os.fsync(out_file.fileno())
+    out_file.close()
+    os.rename(out_file.name, filename)
+
+
+def is_valid_detail_file(filename):
+    '''
+    Check if a detail file is complete: runtime and memory of at least
+    ITERATION_DEFAULT iterations in complete numeric lines
+    '''
+    if not os.path.isfile(filename):
+        return False
+    in_file = open(filename, 'r')
+    data = in_file.read()
+    in_file.close()
+    if not data.endswith('\n'):
+        return False
+    count = 0
+    try:
+        for rec in csv.DictReader(data.splitlines(),
+                                  skipinitialspace=True):
+            float(rec[RUNTIME])
+            float(rec[MEMORY])
+            count += 1
+    except (KeyError, TypeError, ValueError):
+        return False
+    return count >= ITERATION_DEFAULT
+
+
+def append_journal(event, task=None, **field_dict):
+    '''
+    Append event of a run (task) to the journal
+    '''
+    field_dict.update({'time': round(time.time(), 3), 'event': event})
+    if task is not None:
+        field_dict['task'] = list(task)
+    out_file = open(JOURNAL_FILE, 'a')
+    out_file.write(json.dumps(field_dict, sort_keys=True) + '\n')
+    out_file.flush()
+    os.fsync(out_file.fileno())
+    out_file.close()
+
+
+def get_failure_dict():
+    '''
+    Get number of failed attempts by task from the journal (an incomplete
+    last line, from an interrupted write, is ignored). Failures before the
+    last reset event are not counted
+    '''
+    failure_dict = {}
+    if not os.path.isfile(JOURNAL_FILE):
+        return failure_dict
+    in_file = open(JOURNAL_FILE, 'r')
+    for line in in_file:
+        try:
+            event_dict = json.loads(line)
+        except ValueError:
+            continue
+        if event_dict['event'] == RUN_RESET:
+            failure_dict.clear()
+            continue
+        task = tuple(event_dict['task'])
+        if event_dict['event'] == RUN_FAILURE:
+            failure_dict[task] = failure_dict.get(task, 0) + 1
+        elif event_dict['event'] == RUN_SUCCESS:
+            failure_dict.pop(task, None)
+    in_file.close()
+    return failure_dict
+
+
+def get_pending_tasks(task_list, max_attempts=MAX_ATTEMPTS):
+    '''
+    Get tasks to run as tuples (task, failed attempts). Tasks with valid
+    detail files are done, invalid detail files are moved away (suffix
+    INVALID_SUFFIX) and files left by interrupted runs are removed.
+    Tasks which failed max_attempts times are skipped
+    '''
+    failure_dict = get_failure_dict()
+    pending_list = []
+    for task in task_list:
+        detail_file = get_detail_file(*task)
+        remove_file(get_temp_file(detail_file))
+        remove_file(get_temp_file(get_resource_file(detail_file)))
+        if os.path.isfile(detail_file):
+            if is_valid_detail_file(detail_file):
+                continue
+            print 'Invalid detail file moved to ' + detail_file + \
+                INVALID_SUFFIX
+            os.rename(detail_file, detail_file + INVALID_SUFFIX)
+            remove_file(get_resource_file(detail_file))
+        failures = failure_dict.get(task, 0)
+        if failures >= max_attempts:
+            print 'Skipping ' + detail_file + ' (failed ' + \
+                str(failures) + ' times)'
+            continue
+        pending_list.append((task, failures))
+    return pending_list
+
+
+def get_run_jobs(jobs):
+    '''
+    Limit number of parallel runs to the number of available cores
+    (minus reserved cores), so each run has a dedicated core
+    '''
+    max_jobs = max(multiprocessing.cpu_count() - RESERVED_CORES, 1)
+    if jobs > max_jobs:
+        print 'Limiting parallel runs to ' + str(max_jobs)
+        return max_jobs
+    return jobs
+
+
+def get_task_list(experiment_list, algorithm_list=ALGORITHM_LIST,
+                  run_count=RUN_COUNT):
+    '''
+    Get list of experiment runs as tuples (algorithm, experiment ID, count)
+    (run_count runs of each algorithm of algorithm_list)
+    '''
+    task_list = []
+    for count in range(run_count):
+        for alg in algorithm_list:
+            for exp_rec in experiment_list:
+                exp_id = get_experiment_id(exp_rec)
+                task_list.append((alg, exp_id, count + 1))
+    return task_list
+
+
+def run_tasks(task_list, jobs, sample_interval=SAMPLE_INTERVAL,
+              timeout=RUN_TIMEOUT, memory_limit=MEMORY_LIMIT,
+              max_attempts=MAX_ATTEMPTS):
+    '''
+    Run list of tasks (algorithm, experiment ID, count) without valid
+    detail files. With more than one job, runs are parallel and each one is
+    pinned to a dedicated core. Attempts and their results are recorded in
+    the journal and failed runs are retried (up to max_attempts attempts)
+    after RETRY_DELAY seconds, doubled on every failure
+    '''
+    # Cores from RESERVED_CORES on are used by parallel runs
+    if jobs > 1:
+        free_cores = range(RESERVED_CORES, RESERVED_CORES + jobs)
+        free_cores.reverse()
+    else:
+        free_cores = [None]
+    # Tasks waiting to run (time to start, task, failed attempts)
+    waiting = deque((0.0, task, failures) for task, failures in
+                    get_pending_tasks(task_list, max_attempts))
+    # Running processes (managed run, task, failed attempts, core)
+    running_list = []
+    # Termination (e.g. by a batch scheduler) also kills running processes
+    handler = signal.signal(signal.SIGTERM, raise_interrupt)
+    try:
+        while waiting or running_list:
+            # Start due runs while there are free cores
+            now = time.time()
+            for item in list(waiting):
+                if not free_cores:
+                    break
+                start, task, failures = item
+                if start > now:
+                    continue
+                waiting.remove(item)
+                detail_file = get_detail_file(*task)
+                core = free_cores.pop()
+                command = get_run_command(task[0], task[1],
+                                          get_temp_file(detail_file))
+                if core is None:
+                    print command
+                else:
+                    print '[core ' + str(core) + '] ' + command
+                append_journal(RUN_START, task, attempt=failures + 1)
+                try:
+                    running_list.append(
+                        (ManagedRun(command, detail_file, core,
+                                    sample_interval, timeout, memory_limit),
+                         task, failures, core))
+                except OSError as exc:
+                    # Command not started (e.g. not found), retried as
+                    # other failures
+                    print 'Command failed: ' + str(exc)
+                    free_cores.append(core)
+                    check_detail_file(detail_file)
+                    failures += 1
+                    append_journal(RUN_FAILURE, task, attempt=failures,
+                                   reason=str(exc))
+                    retry_task(waiting, task, failures, max_attempts)
+            # Wait for some run to finish
+            time.sleep(POLL_INTERVAL)
+            for item in list(running_list):
+                managed_run, task, failures, core = item
+                if not managed_run.poll():
+                    continue
+                running_list.remove(item)
+                free_cores.append(core)
+                resource_dict = managed_run.resource_dict
+                if managed_run.succeeded():
+                    append_journal(RUN_SUCCESS, task, attempt=failures + 1,
+                                   wall_time=resource_dict[WALL_TIME],
+                                   max_rss=resource_dict[MAX_RSS])
+                    continue
+                failures += 1
+                append_journal(RUN_FAILURE, task, attempt=failures,
+                               reason=managed_run.reason,
+                               wall_time=resource_dict[WALL_TIME],
+                               max_rss=resource_dict[MAX_RSS])
+                retry_task(waiting, task, failures, max_attempts)
+    finally:
+        # Interrupted runs are killed (their files are removed on resume)
+        for managed_run, _, _, _ in running_list:
+            managed_run.kill('interrupted')
+        signal.signal(signal.SIGTERM, handler)
+
+
+def retry_task(waiting, task, failures, max_attempts):
+    '''
+    Put a failed task in the waiting queue (time to start, task, failed
+    attempts) after RETRY_DELAY seconds, doubled on every failure, if it
+    has attempts left
+    '''
+    detail_file = get_detail_file(*task)
+    if failures < max_attempts:
+        delay = RETRY_DELAY * 2 ** (failures - 1)
+        print 'Retrying ' + detail_file + ' in ' + str(delay) + 's'
+        waiting.append((time.time() + delay, task, failures))
+    else:
+        print 'Giving up ' + detail_file + ' after ' + str(failures) + \
+            ' attempts'
+
+
+def raise_interrupt(signum, _frame):
+    '''
+    Signal handler raising KeyboardInterrupt
+    '''
+    raise KeyboardInterrupt('Signal ' + str(signum))
+
+
+def read_run_result(detail_file):
+    '''
+    Read result (total runtime, average memory) of a detail file,
+    the same values summarized by get_summary_dict
+    '''
+    runtime_list = []
+    memory_list = []
+    in_file = open(detail_file, 'r')
+    for rec in csv.DictReader(in_file, skipinitialspace=True):
+        runtime_list.append(float(rec[RUNTIME]))
+        memory_list.append(float(rec[MEMORY]))
+    in_file.close()
+    if not memory_list:
+        return (float('NaN'), float('NaN'))
+    return (math.fsum(runtime_list),
+            math.fsum(memory_list) / len(memory_list))
+
+
+def is_precise(sample_list, target_ci):
+    '''
+    Check if the confidence interval of a list of samples has a relative
+    half-width of at most target_ci
+    '''
+    mean, _, half_width = get_confidence_interval(sample_list)
+    if math.isnan(half_width):
+        return False
+    if mean == 0:
+        return half_width == 0
+    return half_width / abs(mean) <= target_ci
+
+
+def is_cell_stopped(result_list, target_ci=TARGET_CI, min_runs=MIN_RUNS,
+                    max_runs=MAX_RUNS):
+    '''
+    Check if adaptive repetition stops running an (algorithm, experiment)
+    with results (list of (runtime, memory)) of its first runs
+    '''
+    runs = len(result_list)
+    if runs < min_runs:
+        return False
+    return runs >= max_runs or \
+        all(is_precise(sample_list, target_ci)
+            for sample_list in zip(*result_list))
+
+
+def get_stopped_runs(task_list, result_dict, failed_set,
+                     adaptive=(TARGET_CI, MIN_RUNS, MAX_RUNS)):
+    '''
+    Get runs of a task list which adaptive repetition does not start:
+    runs of an (algorithm, experiment) after the run whose results
+    (result_dict by task) reach the stop condition or after a failed run.
+    The adaptive repetition is (target_ci, min_runs, max_runs)
+    '''
+    cell_dict = OrderedDict()
+    for task in sorted(task_list, key=lambda task: task[2]):
+        cell_dict.setdefault(task[:2], []).append(task)
+    stopped_set = set()
+    for cell_task_list in cell_dict.values():
+        result_list = []
+        stopped = False
+        for task in cell_task_list:
+            if stopped:
+                stopped_set.add(task)
+            elif task in failed_set:
+                stopped = True
+            elif task in result_dict:
+                result_list.append(result_dict[task])
+                stopped = is_cell_stopped(result_list, *adaptive)
+            else:
+                break
+    return stopped_set
+
+
+def run_adaptive(experiment_list, jobs, sample_interval=SAMPLE_INTERVAL,
+                 target_ci=TARGET_CI, min_runs=MIN_RUNS, max_runs=MAX_RUNS,
+                 limits=(RUN_TIMEOUT, MEMORY_LIMIT, MAX_ATTEMPTS),
+                 algorithm_list=ALGORITHM_LIST):
+    '''
+    Run experiments until the confidence intervals of runtime and memory of
+    every (algorithm of algorithm_list, experiment) reach relative
+    half-width target_ci, using between min_runs and max_runs runs.
+    The limits are the (timeout, memory limit, maximum attempts) of each run
+    '''
+    # Results of runs done (lists of (runtime, memory)) by cell
+    # (algorithm, experiment ID) not stopped yet
+    pending_dict = OrderedDict()
+    for exp_rec in experiment_list:
+        for alg in algorithm_list:
+            pending_dict[(alg, get_experiment_id(exp_rec))] = []
+    stop_count = 0
+    while pending_dict:
+        # Tasks of next round (at least min_runs runs for every cell)
+        task_list = []
+        for (alg, exp_id), result_list in pending_dict.items():
+            done = len(result_list)
+            for count in range(done + 1, max(min_runs, done + 1) + 1):
+                task_list.append((alg, exp_id, count))
+        task_list.sort(key=lambda task: task[2])
+        run_tasks(task_list, jobs, sample_interval, *limits)
+        # Collect results and check stop condition of each cell
+        for alg, exp_id, count in task_list:
+            result_list = pending_dict.get((alg, exp_id))
+            if result_list is None or len(result_list) != count - 1:
+                continue
+            detail_file = get_detail_file(alg, exp_id, count)
+            if not os.path.isfile(detail_file):
+                print 'Stopping ' + alg + ' ' + exp_id + ' (failed run)'
+                del pending_dict[(alg, exp_id)]
+                continue
+            result_list.append(read_run_result(detail_file))
+        for (alg, exp_id), result_list in pending_dict.items():
+            runs = len(result_list)
+            if is_cell_stopped(result_list, target_ci, min_runs, max_runs):
+                print 'Stopping ' + alg + ' ' + exp_id + ' after ' + \
+                    str(runs) + ' runs'
+                del pending_dict[(alg, exp_id)]
+                stop_count += 1
+    print 'Experiments finished: ' + str(stop_count)
+
+
+def run_experiments(experiment_list, jobs=1, sample_interval=SAMPLE_INTERVAL,
+                    target_ci=TARGET_CI, min_runs=MIN_RUNS,
+                    max_runs=MAX_RUNS,
+                    limits=(RUN_TIMEOUT, MEMORY_LIMIT, MAX_ATTEMPTS),
+                    algorithm_list=ALGORITHM_LIST, run_count=RUN_COUNT):
+    '''
+    Run all experiments with algorithms of algorithm_list (run_count runs
+    of each one or, if target_ci is not zero, adaptive number of runs).
+    The limits are the (timeout, memory limit, maximum attempts) of each run
+    '''
+    jobs = get_run_jobs(jobs)
+    lock_file = lock_runs()
+    try:
+        if target_ci > 0:
+            run_adaptive(experiment_list, jobs, sample_interval, target_ci,
+                         min_runs, max_runs, limits, algorithm_list)
+        else:
+            run_tasks(get_task_list(experiment_list, algorithm_list,
+                                    run_count),
+                      jobs, sample_interval, *limits)
+    finally:
+        lock_file.close()
+
+
+def lock_runs():
+    '''
+    Take a shared lock of RUN_LOCK_FILE, held until the returned file is
+    closed, so monitors know that experiments are running
+    '''
+    lock_file = open(RUN_LOCK_FILE, 'a')
+    fcntl.flock(lock_file, fcntl.LOCK_SH)
+    return lock_file
+
+
+def is_running():
+    '''
+    Check if some process is running experiments (holding the lock of
+    RUN_LOCK_FILE)
+    '''
+    if not os.path.isfile(RUN_LOCK_FILE):
+        return False
+    lock_file = open(RUN_LOCK_FILE, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except IOError:
+        return True
+    finally:
+        lock_file.close()
+    return False
+
+
+def get_work_units(exp_conf):
+    '''
+    Get work units of an experiment used to estimate its cost
+    (attribute values of the tuples processed by a run)
+    '''
+    return exp_conf[ATT] * (exp_conf[TUP] + (ITERATION_DEFAULT - 1) *
+                            (exp_conf[DEL] + exp_conf[INS]))
+
+
+def estimate_costs(experiment_list, cost_dict,
+                   algorithm_list=ALGORITHM_LIST):
+    '''
+    Estimate cost (seconds) of a run of every (algorithm, experiment).
+    Experiments with past runs use their mean cost, the others use the
+    mean cost per work unit of the algorithm (None if the algorithm has
+    no past runs). Return dictionary of (cost, source) by
+    (algorithm, experiment ID)
+    '''
+    # Cost and work units of past runs by algorithm
+    total_dict = {}
+    for exp_rec in experiment_list:
+        exp_id = get_experiment_id(exp_rec)
+        for alg in algorithm_list:
+            cost_list = cost_dict.get((alg, exp_id))
+            if not cost_list:
+                continue
+            cost, units = total_dict.get(alg, (0.0, 0))
+            total_dict[alg] = (cost + math.fsum(cost_list),
+                               units + get_work_units(exp_rec) *
+                               len(cost_list))
+    estimate_dict = {}
+    for exp_rec in experiment_list:
+        exp_id = get_experiment_id(exp_rec)
+        for alg in algorithm_list:
+            cost_list = cost_dict.get((alg, exp_id))
+            if cost_list:
+                estimate_dict[(alg, exp_id)] = \
+                    (math.fsum(cost_list) / len(cost_list), 'history')
+            elif total_dict.get(alg, (0.0, 0))[1] > 0:
+                cost, units = total_dict[alg]
+                estimate_dict[(alg, exp_id)] = \
+                    (cost / units * get_work_units(exp_rec), 'model')
+            else:
+                estimate_dict[(alg, exp_id)] = (None, 'unknown')
+    return estimate_dict
+
+
+def plan_experiments(experiment_list, all_experiment_list, jobs=1,
+                     target_ci=TARGET_CI, max_runs=MAX_RUNS,
+                     algorithm_list=ALGORITHM_LIST, run_count=RUN_COUNT):
+    '''
+    Dry run: list pending work (stale files and runs without detail
+    files) of experiments and estimate cost of pending runs from past runs
+    of all experiments of the plan. Nothing is written (past runs are read
+    from the results database as loaded by the last summarization)
+    '''
+    manifest = load_manifest()
+    for label, functions in \
+            [('tables', (get_table_id, get_table_file, get_table_inputs)),
+             ('queries', (get_query_id, get_query_file, get_query_inputs)),
+             ('environments', (get_experiment_id, get_env_file,
+                               get_env_inputs))]:
+        id_function, file_function, inputs_function = functions
+        conf_list = get_unique_list(experiment_list, id_function)
+        print 'Pending ' + label + ': ' + \
+            str(len(get_stale_list(manifest, conf_list, file_function,
+                                   inputs_function))) + \
+            ' of ' + str(len(conf_list))
+    estimate_dict = estimate_costs(all_experiment_list, read_cost_dict(),
+                                   algorithm_list)
+    # Adaptive repetition runs at most max_runs times
+    if target_ci > 0:
+        run_count = max_runs
+        print 'Adaptive repetition: estimates for at most ' + \
+            str(max_runs) + ' runs'
+    total_dict = OrderedDict((alg, [0, 0.0]) for alg in algorithm_list)
+    unknown = 0
+    for exp_rec in experiment_list:
+        exp_id = get_experiment_id(exp_rec)
+        for alg in algorithm_list:
+            pending = len([count for count in range(1, run_count + 1)
+                           if not os.path.isfile(
+                               get_detail_file(alg, exp_id, count))])
+            if not pending:
+                continue
+            cost, source = estimate_dict[(alg, exp_id)]
+            total_dict[alg][0] += pending
+            line = alg + ' ' + exp_id + ': ' + str(pending) + ' runs'
+            if cost is None:
+                unknown += pending
+            else:
+                total_dict[alg][1] += cost * pending
+                line += ', ' + format_duration(cost * pending) + \
+                    ' (' + source + ')'
+            print line
+    total = 0.0
+    for alg, (pending, cost) in total_dict.items():
+        print 'Total ' + alg + ': ' + str(pending) + ' runs, ' + \
+            format_duration(cost)
+        total += cost
+    print 'Total: ' + format_duration(total) + ' (' + \
+        format_duration(total / get_run_jobs(jobs)) + ' with ' + \
+        str(get_run_jobs(jobs)) + ' jobs)'
+    if unknown:
+        print str(unknown) + ' runs without estimate (no past runs of ' + \
+            'their algorithms)'
+
+
+class WorkQueue(object):
+    '''
+    Queue of experiment runs (algorithm, experiment ID, count) leased to
+    workers. Leases expire if workers do not send heartbeats (their tasks
+    are queued again) and failed runs are retried with the backoff of
+    run_tasks. Results uploaded by workers are stored as detail and
+    resource files. Requests may come from concurrent threads. Tasks only
+    leave the queue or their lease once the change is journaled, so tasks
+    of requests failing halfway (e.g. full disk) are not lost
+    '''
+
+    def __init__(self, task_list, max_attempts=MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        # Tasks waiting to run (time to start, task, failed attempts)
+        self.waiting = deque((0.0, task, failures) for task, failures in
+                             get_pending_tasks(task_list, max_attempts))
+        # Leased tasks by lease ID (task, failed attempts, worker, expire)
+        self.lease_dict = {}
+        self.lease_ids = itertools.count(1)
+        self.total = len(self.waiting)
+        self.succeeded = 0
+        self.failed = 0
+
+    def handle(self, request):
+        '''
+        Handle a worker request (dictionary with operation 'op') and
+        return the response
+        '''
+        op_dict = {'lease': self.lease, 'heartbeat': self.heartbeat,
+                   'complete': self.complete, 'fail': self.fail}
+        if request.get('op') not in op_dict:
+            return {'error': 'invalid operation: ' + str(request.get('op'))}
+        with self.lock:
+            self.expire()
+            return op_dict[request['op']](request)
+
+    def lease(self, request):
+        '''
+        Lease next due task to a worker
+        '''
+        now = time.time()
+        for item in self.waiting:
+            start, task, failures = item
+            if start > now:
+                continue
+            append_journal(RUN_START, task, attempt=failures + 1,
+                           worker=request['worker'])
+            self.waiting.remove(item)
+            lease_id = str(next(self.lease_ids))
+            self.lease_dict[lease_id] = (task, failures, request['worker'],
+                                         now + LEASE_TIMEOUT)
+            print 'Leased ' + get_detail_file(*task) + ' to ' + \
+                request['worker']
+            return {'task': list(task), 'lease': lease_id}
+        if self.waiting or self.lease_dict:
+            return {'wait': WORKER_WAIT}
+        return {'done': True}
+
+    def heartbeat(self, request):
+        '''
+        Extend a lease (not ok if the lease has expired)
+        '''
+        lease = self.lease_dict.get(request['lease'])
+        if lease is None:
+            return {'ok': False}
+        self.lease_dict[request['lease']] = \
+            lease[:3] + (time.time() + LEASE_TIMEOUT,)
+        return {'ok': True}
+
+    def complete(self, request):
+        '''
+        Store results (detail and resource files) of a successful run.
+        If they can not be stored, the run fails
+        '''
+        lease = self.lease_dict.get(request['lease'])
+        if lease is None:
+            return {'ok': False}
+        task, failures, worker, _ = lease
+        detail_file = get_detail_file(*task)
+        try:
+            store_results(detail_file, request['detail'],
+                          request['resource'])
+            append_journal(RUN_SUCCESS, task, attempt=failures + 1,
+                           worker=worker)
+        except Exception as exc:  # IGNORE:broad-except
+            request['reason'] = 'results not stored: ' + str(exc)
+            self.fail(request)
+            return {'error': request['reason']}
+        del self.lease_dict[request['lease']]
+        self.succeeded += 1
+        print 'Finished ' + detail_file + ' (' + worker + ')'
+        return {'ok': True}
+
+    def fail(self, request):
+        '''
+        Record failed run and queue it again (with backoff) if it has
+        attempts left
+        '''
+        lease = self.lease_dict.get(request['lease'])
+        if lease is None:
+            return {'ok': False}
+        task, failures, worker, _ = lease
+        failures += 1
+        append_journal(RUN_FAILURE, task, attempt=failures, worker=worker,
+                       reason=request.get('reason'))
+        del self.lease_dict[request['lease']]
+        detail_file = get_detail_file(*task)
+        print 'Run failed (' + str(request.get('reason')) + '): ' + \
+            detail_file + ' (' + worker + ')'
+        if failures < self.max_attempts:
+            self.waiting.append((time.time() +
+                                 RETRY_DELAY * 2 ** (failures - 1),
+                                 task, failures))
+        else:
+            print 'Giving up ' + detail_file + ' after ' + \
+                str(failures) + ' attempts'
+            self.failed += 1
+        return {'ok': True}
+
+    def expire(self):
+        '''
+        Queue again the tasks of expired leases (lost workers). Lost runs
+        are not counted as failed attempts
+        '''
+        now = time.time()
+        for lease_id, lease in self.lease_dict.items():
+            task, failures, worker, expire = lease
+            if expire > now:
+                continue
+            del self.lease_dict[lease_id]
+            append_journal(RUN_LOST, task, attempt=failures + 1,
+                           worker=worker)
+            print 'Lost ' + get_detail_file(*task) + ' (' + worker + ')'
+            self.waiting.appendleft((0.0, task, failures))
+
+    def is_finished(self):
+        '''
+        Check if there are no waiting or leased tasks
+        '''
+        with self.lock:
+            self.expire()
+            return not self.waiting and not self.lease_dict
+
+
+def store_results(detail_file, detail, resource):
+    '''
+    Store the contents of the detail and resource files uploaded by a
+    worker (ValueError if the detail file is not valid)
+    '''
+    temp_file = get_temp_file(detail_file)
+    resource_file = get_resource_file(detail_file)
+    try:
+        out_file = open(temp_file, 'w')
+        out_file.write(detail)
+        out_file.close()
+        if not is_valid_detail_file(temp_file):
+            raise ValueError('invalid detail file')
+        res_file = open(get_temp_file(resource_file), 'w')
+        res_file.write(resource)
+        commit_file(res_file, resource_file)
+        commit_file(open(temp_file, 'a'), detail_file)
+    finally:
+        remove_file(temp_file)
+        remove_file(get_temp_file(resource_file))
+
+
+class QueueHandler(SocketServer.StreamRequestHandler):
+    '''
+    Handler of a worker connection (a JSON request and a JSON response,
+    one per line)
+    '''
+
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            response = self.server.queue.handle(json.loads(line))
+        except (KeyError, TypeError, ValueError) as exc:
+            response = {'error': 'invalid request: ' + str(exc)}
+        except Exception as exc:  # IGNORE:broad-except
+            # Leases of failed requests are kept (they expire if the
+            # worker does not try again)
+            print 'Request failed: ' + str(exc)
+            response = {'error': 'request failed: ' + str(exc)}
+        self.wfile.write(json.dumps(response) + '\n')
+
+
+class QueueServer(SocketServer.ThreadingTCPServer):
+    '''
+    TCP server of a work queue
+    '''
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, queue):
+        SocketServer.ThreadingTCPServer.__init__(self, address, QueueHandler)
+        self.queue = queue
+
+
+def run_coordinator(experiment_list, port, max_attempts=MAX_ATTEMPTS,
+                    algorithm_list=ALGORITHM_LIST, run_count=RUN_COUNT):
+    '''
+    Publish runs of experiments (run_count runs of each algorithm of
+    algorithm_list) to workers connecting to a TCP port until every run has
+    finished or failed max_attempts times
+    '''
+    lock_file = lock_runs()
+    queue = WorkQueue(get_task_list(experiment_list, algorithm_list,
+                                    run_count), max_attempts)
+    server = QueueServer(('', port), queue)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    print 'Coordinator on port ' + str(server.server_address[1]) + ': ' + \
+        str(queue.total) + ' runs'
+    try:
+        while not queue.is_finished():
+            time.sleep(POLL_INTERVAL)
+        # Idle workers are told to stop
+        time.sleep(WORKER_WAIT * 2)
+    finally:
+        server.shutdown()
+        server.server_close()
+        lock_file.close()
+    print 'Runs finished: ' + str(queue.succeeded) + ' (failed: ' + \
+        str(queue.failed) + ')'
+
+
+def send_request(address, request):
+    '''
+    Send a request to the coordinator and return its response
+    '''
+    connection = socket.create_connection(address, HEARTBEAT_INTERVAL)
+    try:
+        connection.sendall(json.dumps(request) + '\n')
+        in_file = connection.makefile('r')
+        line = in_file.readline()
+        in_file.close()
+    finally:
+        connection.close()
+    if not line:
+        raise socket.error('Connection closed by coordinator')
+    return json.loads(line)
+
+
+def send_retry(address, request):
+    '''
+    Send a request to the coordinator, trying again for WORKER_RETRY
+    seconds if it is not reachable (None if it is not)
+    '''
+    deadline = time.time() + WORKER_RETRY
+    while True:
+        try:
+            return send_request(address, request)
+        except socket.error as exc:
+            if time.time() > deadline:
+                print 'Coordinator not reachable: ' + str(exc)
+                return None
+            time.sleep(WORKER_WAIT)
+
+
+def prepare_files(lock_name, hash_list, gen_function, conf):
+    '''
+    Generate files with gen_function(conf) if some file of hash_list
+    (filename, inputs hash) is stale in the manifest and record their
+    manifest entries. An exclusive lock on lock_name + LOCK_SUFFIX is held
+    meanwhile, so other workers of the node wait for the files instead of
+    using partial ones
+    '''
+    lock_file = open(lock_name + LOCK_SUFFIX, 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Manifest is read under the lock (entries of other workers)
+        manifest = load_manifest()
+        if not any(is_stale(manifest, filename, inputs_hash)
+                   for filename, inputs_hash in hash_list):
+            return
+        result = gen_function(conf)
+        # Groups of derived tables return lists of entries
+        if isinstance(result, tuple):
+            result = [result]
+        for filename, entry in result:
+            record_manifest_entry(manifest, filename, entry)
+    finally:
+        lock_file.close()
+
+
+def prepare_experiment(exp_rec, group_dict=None):
+    '''
+    Generate files (table, query and environment) of an experiment which
+    are stale on the worker, as -g does. With group_dict (group of derived
+    tables by table ID), the table is generated with its group, as
+    -g --derived does
+    '''
+    if group_dict is None:
+        filename = get_table_file(exp_rec)
+        prepare_files(filename,
+                      [(filename, get_inputs_hash(get_table_inputs(exp_rec)))],
+                      gen_table, exp_rec)
+    else:
+        group = group_dict[get_table_id(exp_rec)]
+        base_conf, conf_list = group
+        prepare_files(get_table_file(base_conf),
+                      [(get_table_file(conf),
+                        get_inputs_hash(get_derived_inputs(conf, base_conf)))
+                       for conf in conf_list],
+                      gen_derived_group, group)
+    for file_function, inputs_function, gen_function in \
+            [(get_query_file, get_query_inputs, gen_query),
+             (get_env_file, get_env_inputs, gen_env_file)]:
+        filename = file_function(exp_rec)
+        prepare_files(filename,
+                      [(filename, get_inputs_hash(inputs_function(exp_rec)))],
+                      gen_function, exp_rec)
+
+
+class LeaseHeartbeat(threading.Thread):
+    '''
+    Thread sending heartbeats of a lease to the coordinator every
+    HEARTBEAT_INTERVAL seconds until it is stopped. The event lost is set
+    if the coordinator rejects a heartbeat (expired lease)
+    '''
+
+    def __init__(self, address, lease):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.address = address
+        self.lease = lease
+        self.lost = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self):
+        '''
+        Send heartbeats until stopped or until the lease is lost
+        '''
+        while not self.stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                response = send_request(self.address, {'op': 'heartbeat',
+                                                       'lease': self.lease})
+            except socket.error:
+                continue
+            # Error replies (failed requests) do not mean the lease is lost
+            if response.get('ok') is False:
+                self.lost.set()
+                return
+
+    def stop(self):
+        '''
+        Stop sending heartbeats
+        '''
+        self.stopped.set()
+        self.join()
+
+
+def run_leased_task(task, exp_rec, scratch_dir, heartbeat,
+                    limits=(SAMPLE_INTERVAL, RUN_TIMEOUT, MEMORY_LIMIT),
+                    group_dict=None):
+    '''
+    Run a leased task writing its files in a scratch directory (only the
+    coordinator stores detail files) and return the request reporting its
+    result. The run is killed if heartbeat reports the lease as lost.
+    The limits are the (sample interval, timeout, memory limit) of the run
+    and group_dict has the groups of derived tables (see prepare_experiment)
+    '''
+    if exp_rec is None:
+        return {'op': 'fail', 'reason': 'unknown experiment'}
+    prepare_experiment(exp_rec, group_dict)
+    if heartbeat.lost.is_set():
+        return {'op': 'fail', 'reason': 'lease lost'}
+    detail_file = scratch_dir + os.sep + \
+        os.path.basename(get_detail_file(*task))
+    command = get_run_command(task[0], task[1], get_temp_file(detail_file))
+    print command
+    try:
+        managed_run = ManagedRun(command, detail_file, None, *limits)
+    except OSError as exc:
+        return {'op': 'fail', 'reason': str(exc)}
+    try:
+        while not managed_run.poll():
+            time.sleep(POLL_INTERVAL)
+            if heartbeat.lost.is_set():
+                managed_run.kill('lease lost')
+    except KeyboardInterrupt:
+        managed_run.kill('interrupted')
+        raise
+    if not managed_run.succeeded():
+        return {'op': 'fail', 'reason': managed_run.reason}
+    request = {'op': 'complete'}
+    for key, filename in [('detail', detail_file),
+                          ('resource', get_resource_file(detail_file))]:
+        in_file = open(filename, 'r')
+        request[key] = in_file.read()
+        in_file.close()
+    return request
+
+
+def run_worker(address, experiment_list, sample_interval=SAMPLE_INTERVAL,
+               timeout=RUN_TIMEOUT, memory_limit=MEMORY_LIMIT, derived=False):
+    '''
+    Lease runs from a coordinator at address (host, port), run them
+    (sending heartbeats) and upload their results. Tables are derived from
+    base streams if derived is True (as generated by -g --derived)
+    '''
+    worker = socket.gethostname() + ':' + str(os.getpid())
+    exp_dict = {get_experiment_id(exp_rec): exp_rec
+                for exp_rec in experiment_list}
+    group_dict = None
+    if derived:
+        group_dict = {get_table_id(conf): group
+                      for group in get_derived_groups(experiment_list)
+                      for conf in group[1]}
+    print 'Worker ' + worker + ' connecting to ' + address[0] + ':' + \
+        str(address[1])
+    count = 0
+    error_time = None
+    while True:
+        response = send_retry(address, {'op': 'lease', 'worker': worker})
+        if response is None or response.get('done'):
+            break
+        if 'error' in response:
+            # Errors of the coordinator (e.g. writing the journal) may be
+            # transient, the worker stops if they last WORKER_RETRY seconds
+            print 'Coordinator error: ' + response['error']
+            if error_time is None:
+                error_time = time.time()
+            elif time.time() - error_time > WORKER_RETRY:
+                break
+            time.sleep(WORKER_WAIT)
+            continue
+        error_time = None
+        if 'wait' in response:
+            time.sleep(response['wait'])
+            continue
+        task = tuple(response['task'])
+        # Heartbeats keep the lease from now on (generation of files
+        # may take longer than LEASE_TIMEOUT)
+        heartbeat = LeaseHeartbeat(address, response['lease'])
+        heartbeat.start()
+        scratch_dir = tempfile.mkdtemp(prefix='prefgen-')
+        try:
+            request = run_leased_task(task, exp_dict.get(task[1]),
+                                      scratch_dir, heartbeat,
+                                      (sample_interval, timeout,
+                                       memory_limit), group_dict)
+            request['lease'] = response['lease']
+            response = send_retry(address, request)
+        finally:
+            heartbeat.stop()
+            shutil.rmtree(scratch_dir)
+        if response is not None and 'error' in response:
+            print 'Coordinator error: ' + response['error']
+        elif request['op'] == 'complete' and response and \
+                response.get('ok'):
+            count += 1
+    print 'Worker ' + worker + ' finished ' + str(count) + ' runs'
+
+
+def open_results_db(filename=RESULTS_DB):
+    '''
+    Open database of experiment results (creating tables if necessary)
+    '''
+    connection = sqlite3.connect(filename)
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS files (
+            filename TEXT PRIMARY KEY, algorithm TEXT, experiment TEXT,
+            count INTEGER, size INTEGER, mtime REAL)''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS iterations (
+            algorithm TEXT, experiment TEXT, count INTEGER,
+            iteration INTEGER, runtime REAL, memory REAL,
+            PRIMARY KEY (algorithm, experiment, count, iteration))''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS resources (
+            algorithm TEXT, experiment TEXT, count INTEGER,
+            wall_time REAL, user_time REAL, sys_time REAL, max_rss INTEGER,
+            voluntary_switches INTEGER, involuntary_switches INTEGER,
+            exit_status INTEGER, timeline TEXT,
+            PRIMARY KEY (algorithm, experiment, count))''')
+    return connection
+
+
+def parse_detail_file(filename):
+    '''
+    Get (algorithm, experiment ID, count) from a detail filename
+    (inverse of get_detail_file) or from a resource filename
+    '''
+    if filename.endswith(RESOURCE_SUFFIX):
+        filename = filename[:-len(RESOURCE_SUFFIX)] + '.csv'
+    algorithm, rest = os.path.basename(filename).split('-', 1)
+    experiment_id, count, _ = rest.rsplit('.', 2)
+    return (algorithm, experiment_id, int(count))
+
+
+def load_detail_file(connection, filename):
+    '''
+    Load iterations of a detail file into results database
+    '''
+    algorithm, experiment_id, count = parse_detail_file(filename)
+    key = (algorithm, experiment_id, count)
+    connection.execute('''DELETE FROM iterations WHERE algorithm = ?
+                          AND experiment = ? AND count = ?''', key)
+    in_file = open(filename, 'r')
+    reader = csv.DictReader(in_file, skipinitialspace=True)
+    connection.executemany('''INSERT INTO iterations
+                              VALUES (?, ?, ?, ?, ?, ?)''',
+                           (key + (iteration, float(rec[RUNTIME]),
+                                   float(rec[MEMORY]))
+                            for iteration, rec in enumerate(reader)))
+    in_file.close()
+    store_file_record(connection, filename, key)
+
+
+def store_file_record(connection, filename, key):
+    '''
+    Store size and modification time of a file loaded into results database
+    '''
+    stat = os.stat(filename)
+    connection.execute('''INSERT OR REPLACE INTO files
+                          VALUES (?, ?, ?, ?, ?, ?)''',
+                       (filename,) + key + (stat.st_size, stat.st_mtime))
+
+
+def load_resource_file(connection, filename):
+    '''
+    Load a resource file into results database
+    '''
+    key = parse_detail_file(filename)
+    in_file = open(filename, 'r')
+    resource_dict = json.load(in_file)
+    in_file.close()
+    resource_dict[TIMELINE] = json.dumps(resource_dict[TIMELINE])
+    connection.execute('''INSERT OR REPLACE INTO resources
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                       key + tuple(resource_dict[field]
+                                   for field in RESOURCE_FIELD_LIST))
+    store_file_record(connection, filename, key)
+
+
+def ingest_details(connection):
+    '''
+    Load new or changed detail files into results database and remove
+    results of deleted files
+    '''
+    file_dict = {}
+    for filename, size, mtime in \
+            connection.execute('SELECT filename, size, mtime FROM files'):
+        file_dict[filename] = (size, mtime)
+    loaded = 0
+    for basename in sorted(os.listdir(DETAILS_DIR)):
+        filename = DETAILS_DIR + os.sep + basename
+        if basename.endswith(RESOURCE_SUFFIX):
+            load_function = load_resource_file
+        elif basename.endswith('.csv'):
+            load_function = load_detail_file
+        else:
+            continue
+        stat = os.stat(filename)
+        if file_dict.pop(filename, None) != (stat.st_size, stat.st_mtime):
+            load_function(connection, filename)
+            loaded += 1
+    for filename in file_dict:
+        key = parse_detail_file(filename)
+        table = 'iterations'
+        if filename.endswith(RESOURCE_SUFFIX):
+            table = 'resources'
+        connection.execute('DELETE FROM ' + table + ''' WHERE algorithm = ?
+                              AND experiment = ? AND count = ?''', key)
+        connection.execute('DELETE FROM files WHERE filename = ?',
+                           (filename,))
+    connection.commit()
+    print 'Detail files loaded: ' + str(loaded) + \
+        ' (removed: ' + str(len(file_dict)) + ')'
+
+
+def get_summary_dict(connection):
+    '''
+    Get dictionary of (total runtime, average memory) by detail file
+    '''
+    cursor = connection.execute('''
+        SELECT algorithm, experiment, count, SUM(runtime), AVG(memory)
+        FROM iterations GROUP BY algorithm, experiment, count''')
+    return {get_detail_file(alg, exp_id, count): (runtime, memory)
+            for alg, exp_id, count, runtime, memory in cursor}
+
+
+def get_first_dict(connection):
+    '''
+    Get dictionary of (runtime, memory) of the first iteration
+    by detail file
+    '''
+    cursor = connection.execute('''
+        SELECT algorithm, experiment, count, runtime, memory
+        FROM iterations WHERE iteration = 0''')
+    return {get_detail_file(alg, exp_id, count): (runtime, memory)
+            for alg, exp_id, count, runtime, memory in cursor}
+
+
+def get_others_dict(connection):
+    '''
+    Get dictionary of (average runtime, average memory) of the iterations
+    after the first one by detail file
+    '''
+    cursor = connection.execute('''
+        SELECT algorithm, experiment, count, AVG(runtime), AVG(memory)
+        FROM iterations WHERE iteration > 0
+        GROUP BY algorithm, experiment, count''')
+    return {get_detail_file(alg, exp_id, count): (runtime, memory)
+            for alg, exp_id, count, runtime, memory in cursor}
+
+
+def get_run_count_dict(connection):
+    '''
+    Get dictionary of number of runs by (algorithm, experiment ID)
+    '''
+    cursor = connection.execute('''
+        SELECT algorithm, experiment, MAX(count) FROM files
+        WHERE filename LIKE '%.csv' GROUP BY algorithm, experiment''')
+    return {(alg, exp_id): count for alg, exp_id, count in cursor}
+
+
+def get_run_count(run_count_dict, algorithm, experiment_id,
+                  run_limit=None):
+    '''
+    Get number of runs of an algorithm for an experiment, at most
+    run_limit if it is not None (RUN_COUNT or run_limit if there are
+    no runs)
+    '''
+    if run_limit is None:
+        return run_count_dict.get((algorithm, experiment_id), RUN_COUNT)
+    return min(run_count_dict.get((algorithm, experiment_id), run_limit),
+               run_limit)
+
+
+def get_cost_dict(connection):
+    '''
+    Get dictionary of costs (seconds) of past runs by (algorithm,
+    experiment ID). The cost of a run is its wall time (resource file)
+    or, without resource file, the sum of its runtimes
+    '''
+    cursor = connection.execute('''
+        SELECT i.algorithm, i.experiment, COALESCE(r.wall_time, i.runtime)
+        FROM (SELECT algorithm, experiment, count, SUM(runtime) AS runtime
+              FROM iterations GROUP BY algorithm, experiment, count) i
+        LEFT JOIN resources r ON r.algorithm = i.algorithm
+            AND r.experiment = i.experiment AND r.count = i.count''')
+    cost_dict = {}
+    for alg, exp_id, cost in cursor:
+        cost_dict.setdefault((alg, exp_id), []).append(cost)
+    return cost_dict
+
+
+def read_cost_dict():
+    '''
+    Get costs of past runs (see get_cost_dict) from the results database
+    without changing it (new detail files are only loaded by summarization)
+    '''
+    cost_dict = {}
+    if not os.path.isfile(RESULTS_DB):
+        return cost_dict
+    connection = sqlite3.connect(RESULTS_DB)
+    table_list = [name for name, in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")]
+    # Databases of older versions may lack the resources table
+    if 'iterations' in table_list and 'resources' in table_list:
+        cost_dict = get_cost_dict(connection)
+    connection.close()
+    return cost_dict
+
+
+def get_resource_dict(connection):
+    '''
+    Get dictionary of (wall time, peak resident memory) by detail file
+    '''
+    cursor = connection.execute('''
+        SELECT algorithm, experiment, count, wall_time, max_rss
+        FROM resources''')
+    return {get_detail_file(alg, exp_id, count): (wall_time, max_rss)
+            for alg, exp_id, count, wall_time, max_rss in cursor}
+
+
+def get_warmup(value_list):
+    '''
+    Get number of warm-up iterations of a run using the Marginal Standard
+    Error Rule (MSER): the truncation point d minimizes the variance of the
+    remaining values divided by their count. Truncation is limited to
+    WARMUP_MAX_FRACTION of the values, so spikes at the end of a run
+    do not remove the whole series
+    '''
+    count = len(value_list)
+    # Suffix sums of values and squared values
+    suffix_sum = [0.0] * (count + 1)
+    suffix_square = [0.0] * (count + 1)
+    for pos in range(count - 1, -1, -1):
+        suffix_sum[pos] = suffix_sum[pos + 1] + value_list[pos]
+        suffix_square[pos] = suffix_square[pos + 1] + value_list[pos] ** 2
+    best_pos = 0
+    best_mser = None
+    for pos in range(int(count * WARMUP_MAX_FRACTION) + 1):
+        remaining = count - pos
+        if remaining < 2:
+            break
+        square_dev = suffix_square[pos] - suffix_sum[pos] ** 2 / remaining
+        mser = max(square_dev, 0.0) / remaining ** 2
+        if best_mser is None or mser < best_mser:
+            best_pos = pos
+            best_mser = mser
+    return best_pos
+
+
+def get_steady_state(runtime_list):
+    '''
+    Get steady state record (warm-up iterations, average runtime,
+    throughput and runtime percentiles) of the runtimes of a run
+    '''
+    warmup = get_warmup(runtime_list)
+    steady_list = sorted(runtime_list[warmup:])
+    steady_rec = {WARMUP: warmup, STEADY: float('NaN'),
+                  THROUGHPUT: float('NaN')}
+    if steady_list:
+        steady_rec[STEADY] = math.fsum(steady_list) / len(steady_list)
+    if steady_rec[STEADY] > 0:
+        steady_rec[THROUGHPUT] = 1.0 / steady_rec[STEADY]
+    for percent in PERCENTILE_LIST:
+        steady_rec['p' + str(percent)] = \
+            get_percentile(steady_list, percent)
+    return steady_rec
+
+
+def get_steady_field_list():
+    '''
+    Get list of fields of steady state records
+    '''
+    return [WARMUP, STEADY, THROUGHPUT] + \
+        ['p' + str(percent) for percent in PERCENTILE_LIST]
+
+
+def get_steady_dict(connection):
+    '''
+    Get dictionary of steady state records by detail file
+    '''
+    cursor = connection.execute('''
+        SELECT algorithm, experiment, count, runtime FROM iterations
+        ORDER BY algorithm, experiment, count, iteration''')
+    steady_dict = {}
+    for key, row_iter in itertools.groupby(cursor, lambda row: row[:3]):
+        steady_dict[get_detail_file(*key)] = \
+            get_steady_state([row[3] for row in row_iter])
+    return steady_dict
+
+
+def get_result(result_dict, detail_file):
+    '''
+    Get result of a detail file (NaN values if there is no result)
+    '''
+    if detail_file not in result_dict:
+        print 'File does not exists: ' + detail_file
+        return (float('NaN'), float('NaN'))
+    return result_dict[detail_file]
+
+
+def get_percentile(sorted_list, percent):
+    '''
+    Get percentile of a sorted list of values (nearest rank)
+    '''
+    if not sorted_list:
+        return float('NaN')
+    rank = int(math.ceil(percent / 100.0 * len(sorted_list)))
+    return sorted_list[max(rank, 1) - 1]
+
+
+class DetailTail(object):
+    '''
+    Incremental reader of a detail file being written by an experiment run.
+    Each read parses only the lines appended since the previous read
+    '''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.offset = 0
+        self.partial = ''
+        self.field_dict = None
+        self.count = 0
+        # Sorted values of runtime and memory
+        self.runtime_list = []
+        self.memory_list = []
+        # Sum of runtime after the first iteration
+        self.others_sum = 0.0
+
+    def read(self):
+        '''
+        Read new complete lines of detail file and return their number
+        '''
+        in_file = open(self.filename, 'r')
+        in_file.seek(self.offset)
+        data = in_file.read()
+        in_file.close()
+        self.offset += len(data)
+        line_list = (self.partial + data).split('\n')
+        # Keep the last (incomplete) line for the next read
+        self.partial = line_list.pop()
+        new_count = 0
+        for line in line_list:
+            value_list = [value.strip() for value in line.split(',')]
+            if self.field_dict is None:
+                self.field_dict = {field: pos for pos, field
+                                   in enumerate(value_list)}
+                continue
+            if len(value_list) < len(self.field_dict):
+                continue
+            runtime = float(value_list[self.field_dict[RUNTIME]])
+            memory = float(value_list[self.field_dict[MEMORY]])
+            bisect.insort(self.runtime_list, runtime)
+            bisect.insort(self.memory_list, memory)
+            if self.count > 0:
+                self.others_sum += runtime
+            self.count += 1
+            new_count += 1
+        return new_count
+
+    def get_others_mean(self):
+        '''
+        Get average runtime after the first iteration
+        '''
+        if self.count < 2:
+            return float('NaN')
+        return self.others_sum / (self.count - 1)
+
+
+def get_baseline_dict():
+    '''
+    Get historical runtime baselines from results database as dictionary
+    of lists of average runtime (after first iteration) of each run
+    by (algorithm, experiment ID)
+    '''
+    baseline_dict = {}
+    if not os.path.isfile(RESULTS_DB):
+        return baseline_dict
+    connection = open_results_db()
+    cursor = connection.execute('''
+        SELECT algorithm, experiment, AVG(runtime) FROM iterations
+        WHERE iteration > 0 GROUP BY algorithm, experiment, count''')
+    for alg, exp_id, runtime in cursor:
+        baseline_dict.setdefault((alg, exp_id), []).append(runtime)
+    connection.close()
+    return baseline_dict
+
+
+def format_duration(seconds):
+    '''
+    Format a duration in seconds as H:MM:SS
+    '''
+    if math.isnan(seconds) or math.isinf(seconds):
+        return '?'
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{h}:{m:02d}:{s:02d}'.format(h=hours, m=minutes, s=seconds)
+
+
+def report_tail(task, tail, baseline_dict):
+    '''
+    Print percentiles of a running experiment and check drift from baseline
+    '''
+    alg, exp_id, count = task
+    text = '  ' + alg + '-' + exp_id + '.' + str(count) + ': ' + \
+        str(tail.count) + '/' + str(ITERATION_DEFAULT) + ' iterations'
+    for name, value_list in [(RUNTIME, tail.runtime_list),
+                             (MEMORY, tail.memory_list)]:
+        text += ', ' + name + ' ' + \
+            ' '.join('p' + str(percent) + '=' +
+                     str(get_percentile(value_list, percent))
+                     for percent in PERCENTILE_LIST)
+    print text
+    baseline_list = baseline_dict.get((alg, exp_id))
+    if not baseline_list or tail.count <= DRIFT_MIN_ITERATIONS:
+        return
+    baseline = sum(baseline_list) / len(baseline_list)
+    mean = tail.get_others_mean()
+    if baseline > 0 and abs(mean - baseline) / baseline > DRIFT_THRESHOLD:
+        print '  DRIFT: average runtime {m:.6g} (baseline {b:.6g}, {d:+.0%})'\
+            .format(m=mean, b=baseline, d=(mean - baseline) / baseline)
+
+
+def monitor_experiments(experiment_list, algorithm_list=ALGORITHM_LIST,
+                        run_count=RUN_COUNT, max_attempts=MAX_ATTEMPTS,
+                        adaptive=(TARGET_CI, MIN_RUNS, MAX_RUNS)):
+    '''
+    Monitor running experiments (tailing detail files) reporting
+    percentiles of iterations, drift from historical baselines, progress
+    and estimated time to finish all runs. Runs which failed max_attempts
+    times (given up by the runner) are finished as failed. Monitoring stops
+    when all runs have finished or no process is running experiments.
+    With adaptive repetition (target_ci, min_runs, max_runs) not zero,
+    runs are followed up to max_runs and runs after the stop of their
+    (algorithm, experiment) are not expected
+    '''
+    target_ci, _, max_runs = adaptive
+    if target_ci > 0:
+        run_count = max_runs
+    task_list = get_task_list(experiment_list, algorithm_list, run_count)
+    baseline_dict = get_baseline_dict()
+    tail_dict = {}
+    finished_dict = {}
+    failed_set = set()
+    # Results (runtime, memory) of finished runs (adaptive repetition)
+    result_dict = {}
+    start_time = None
+    start_iterations = 0
+    try:
+        while True:
+            # Checked before reading, so the last lines of runs are read
+            running = is_running()
+            failure_dict = get_failure_dict()
+            running_list = []
+            for task in task_list:
+                if task in finished_dict or task in failed_set:
+                    continue
+                dfile = get_detail_file(*task)
+                if failure_dict.get(task, 0) >= max_attempts and \
+                        not os.path.isfile(dfile):
+                    failed_set.add(task)
+                    tail_dict.pop(task, None)
+                    continue
+                # Runs write a temporary file renamed when they succeed
+                if not os.path.isfile(dfile):
+                    dfile = get_temp_file(dfile)
+                if task not in tail_dict:
+                    if not os.path.isfile(dfile):
+                        continue
+                    tail_dict[task] = DetailTail(dfile)
+                tail = tail_dict[task]
+                if not os.path.isfile(tail.filename):
+                    # Failed runs are read again from the beginning
+                    if dfile.endswith(TEMP_SUFFIX):
+                        del tail_dict[task]
+                        continue
+                    tail.filename = dfile
+                tail.read()
+                if tail.count >= ITERATION_DEFAULT:
+                    # Finished runs become baselines for next runs
+                    finished_dict[task] = tail.count
+                    result_dict[task] = (
+                        math.fsum(tail.runtime_list),
+                        math.fsum(tail.memory_list) / tail.count)
+                    del tail_dict[task]
+                    if tail.count > 1:
+                        baseline_dict.setdefault(task[:2], []).append(
+                            tail.get_others_mean())
+                elif tail.count > 0:
+                    running_list.append((task, tail))
+            if target_ci > 0:
+                stopped_set = get_stopped_runs(task_list, result_dict,
+                                               failed_set, adaptive)
+                task_list = [task for task in task_list
+                             if task not in stopped_set]
+            # Failed runs do not count as work to do
+            total_iterations = (len(task_list) - len(failed_set)) * \
+                ITERATION_DEFAULT
+            done_iterations = sum(finished_dict.values()) + \
+                sum(tail.count for tail in tail_dict.values())
+            if start_time is None:
+                start_time = time.time()
+                start_iterations = done_iterations
+            elapsed = time.time() - start_time
+            rate = (done_iterations - start_iterations) / elapsed \
+                if elapsed > 0 else 0.0
+            eta = (total_iterations - done_iterations) / rate \
+                if rate > 0 else float('NaN')
+            if done_iterations >= total_iterations:
+                eta = 0.0
+            print '{f}/{t} runs finished ({x} failed), {r} running, '\
+                '{p:.1%} iterations, {i:.2f} iterations/s, ETA {e}'\
+                .format(f=len(finished_dict) + len(failed_set),
+                        t=len(task_list), x=len(failed_set),
+                        r=len(running_list),
+                        p=float(done_iterations) / total_iterations
+                        if total_iterations else 1.0,
+                        i=rate, e=format_duration(eta))
+            for task, tail in running_list:
+                report_tail(task, tail, baseline_dict)
+            if len(finished_dict) + len(failed_set) == len(task_list):
+                break
+            if not running:
+                print 'No experiments running (' + \
+                    str(len(task_list) - len(finished_dict) -
+                        len(failed_set)) + ' runs not finished)'
+                break
+            time.sleep(MONITOR_INTERVAL)
+    except KeyboardInterrupt:
+        print 'Monitor stopped'
+
+
+def get_basename(key, experiment):
+    '''
+    Get a base name for key and experiment
+    '''
+    basename = key
+    if key != DEL and experiment[DEL] == 0:
+        basename += '_no_del'
+    if key != INS and experiment[INS] == 0:
+        basename += '_no_ins'
+    if key != DIS and experiment[DIS] != UNIFORM:
+        basename += '_' + experiment[DIS]
+    if key != SEL and experiment[SEL] > 0:
+        basename += '_sel' + str(experiment[SEL])
+    if key != ARI and experiment[ARI] != ARITY_DEFAULT:
+        basename += '_ari' + str(experiment[ARI])
+    return basename
+
+
+def summarize_details(key, value_list, default_experiment, summary_dict,
+                      resource_dict=None, run_count_dict=None,
+                      steady_dict=None, selection=(ALGORITHM_LIST, None, '')):
+    '''
+    Summarize experiments details (and resources, if resource_dict
+    is not empty, and steady state, if steady_dict is not empty).
+    Algorithms with fewer runs than others (adaptive repetition) have NaN
+    values in the remaining lines. The selection is the (algorithm list,
+    maximum number of runs, file suffix) of the summary
+    '''
+    algorithm_list, run_limit, suffix = selection
+    if run_count_dict is None:
+        run_count_dict = {}
+    time_list = []
+    mem_list = []
+    steady_list = []
+    wall_list = []
+    rss_list = []
+    exp_rec = default_experiment.copy()
+    for value in value_list:
+        exp_rec[key] = value
+        exp_id = get_experiment_id(exp_rec)
+        alg_count_dict = {alg: get_run_count(run_count_dict, alg, exp_id,
+                                             run_limit)
+                          for alg in algorithm_list}
+        for rcount in range(max(alg_count_dict.values())):
+            time_rec = {key: value}
+            mem_rec = {key: value}
+            wall_rec = {key: value}
+            rss_rec = {key: value}
+            steady_rec = {key: value}
+            for alg in algorithm_list:
+                dfile = get_detail_file(alg, exp_id, rcount + 1)
+                if rcount < alg_count_dict[alg]:
+                    runtime, memory = get_result(summary_dict, dfile)
+                else:
+                    runtime, memory = (float('NaN'), float('NaN'))
+                if steady_dict:
+                    for field in get_steady_field_list():
+                        steady_rec[alg + '_' + field] = \
+                            steady_dict.get(dfile, {}).get(field,
+                                                           float('NaN'))
+                time_rec[alg] = runtime
+                mem_rec[alg] = memory
+                if resource_dict:
+                    wall_time, max_rss = resource_dict.get(
+                        dfile, (float('NaN'), float('NaN')))
+                    wall_rec[alg] = wall_time
+                    rss_rec[alg] = max_rss
+            time_list.append(time_rec)
+            mem_list.append(mem_rec)
+            wall_list.append(wall_rec)
+            rss_list.append(rss_rec)
+            steady_list.append(steady_rec)
+    basename = get_basename(key, exp_rec) + suffix
+    fname = RUNTIME_SUMMARY_DIR + os.sep + basename + '.csv'
+    write_file(fname, key, time_list)
+    fname = MEMORY_SUMMARY_DIR + os.sep + basename + '.csv'
+    write_file(fname, key, mem_list)
+    if steady_dict:
+        fname = STEADY_SUMMARY_DIR + os.sep + basename + '.csv'
+        write_file(fname, key, steady_list)
+    if resource_dict:
+        fname = WALL_SUMMARY_DIR + os.sep + basename + '.csv'
+        write_file(fname, key, wall_list)
+        fname = RSS_SUMMARY_DIR + os.sep + basename + '.csv'
+        write_file(fname, key, rss_list)
+
+
+def summarize_iterations(exp_rec, first_dict, others_dict,
+                         run_count_dict=None, steady_dict=None,
+                         selection=(ALGORITHM_LIST, None, '')):
+    '''
+    Summarize experiments details (runtime of first iteration, others and,
+    if steady_dict is not empty, steady state fields). The selection is
+    the (algorithm list, maximum number of runs, file suffix) of the summary
+    '''
+    algorithm_list, run_limit, suffix = selection
+    if steady_dict is None:
+        steady_dict = {}
+    if run_count_dict is None:
+        run_count_dict = {}
+    time_list = []
+    mem_list = []
+    exp_id = get_experiment_id(exp_rec)
+    alg_count_dict = {alg: get_run_count(run_count_dict, alg, exp_id,
+                                         run_limit)
+                      for alg in algorithm_list}
+    for rcount in range(max(alg_count_dict.values())):
+        for alg in algorithm_list:
+            if rcount >= alg_count_dict[alg]:
+                continue
+            time_rec = {ALGORITHM: alg}
+            mem_rec = {ALGORITHM: alg}
+            dfile = get_detail_file(alg, exp_id, rcount + 1)
+            runtime, memory = get_result(first_dict, dfile)
+            time_rec[FIRST] = runtime
+            mem_rec[FIRST] = memory
+            runtime, memory = get_result(others_dict, dfile)
+            time_rec[OTHERS] = runtime
+            mem_rec[OTHERS] = memory
+            if steady_dict:
+                for field in get_steady_field_list():
+                    time_rec[field] = steady_dict.get(dfile, {}).get(
+                        field, float('NaN'))
+            time_list.append(time_rec)
+            mem_list.append(mem_rec)
+    fname = RUNTIME_SUMMARY_DIR + os.sep + 'iterations' + suffix + '.csv'
+    write_file(fname, ALGORITHM, time_list)
+    fname = MEMORY_SUMMARY_DIR + os.sep + 'iterations' + suffix + '.csv'
+    write_file(fname, ALGORITHM, mem_list)
+
+
+def summarize_all(plan, filter_dict=None, algorithm_list=ALGORITHM_LIST,
+                  run_limit=None):
+    '''
+    Summarize all results (only experiments matching filter_dict,
+    algorithms of algorithm_list and at most run_limit runs, if it is not
+    None). Summaries of a selection have their own files
+    '''
+    if filter_dict is None:
+        filter_dict = {}
+    selection = (algorithm_list, run_limit,
+                 get_selection_suffix(filter_dict, algorithm_list,
+                                      run_limit))
+    # Trees generated by older versions lack the newer summary directories
+    create_directories()
+    connection = open_results_db()
+    ingest_details(connection)
+    summary_dict = get_summary_dict(connection)
+    resource_dict = get_resource_dict(connection)
+    run_count_dict = get_run_count_dict(connection)
+    steady_dict = get_steady_dict(connection)
+    for key, value_list, def_rec in \
+            filter_summaries(get_summary_list(plan), filter_dict):
+        summarize_details(key, value_list, def_rec, summary_dict,
+                          resource_dict, run_count_dict, steady_dict,
+                          selection)
+    if match_filters(plan[PLAN_DEFAULT], filter_dict):
+        summarize_iterations(plan[PLAN_DEFAULT], get_first_dict(connection),
+                             get_others_dict(connection), run_count_dict,
+                             steady_dict, selection)
+    connection.close()
+
+
+def get_beta_fraction(a_par, b_par, x_val):
+    '''
+    Continued fraction of the incomplete beta function (Lentz's method)
+    '''
+    tiny = 1e-300
+    c_val = 1.0
+    d_val = 1.0 - (a_par + b_par) * x_val / (a_par + 1.0)
+    d_val = 1.0 / (d_val if abs(d_val) > tiny else tiny)
+    result = d_val
+    for step in range(1, 300):
+        for numerator in [step * (b_par - step) * x_val /
+                          ((a_par + 2 * step - 1) * (a_par + 2 * step)),
+                          -(a_par + step) * (a_par + b_par + step) * x_val /
+                          ((a_par + 2 * step) * (a_par + 2 * step + 1))]:
+            d_val = 1.0 + numerator * d_val
+            d_val = 1.0 / (d_val if abs(d_val) > tiny else tiny)
+            c_val = 1.0 + numerator / c_val
+            c_val = c_val if abs(c_val) > tiny else tiny
+            result *= d_val * c_val
+        if abs(d_val * c_val - 1.0) < 1e-15:
+            break
+    return result
+
+
+def get_incomplete_beta(a_par, b_par, x_val):
+    '''
+    Regularized incomplete beta function I_x(a, b)
+    '''
+    if x_val <= 0.0:
+        return 0.0
+    if x_val >= 1.0:
+        return 1.0
+    log_front = math.lgamma(a_par + b_par) - math.lgamma(a_par) - \
+        math.lgamma(b_par) + a_par * math.log(x_val) + \
+        b_par * math.log(1.0 - x_val)
+    if x_val < (a_par + 1.0) / (a_par + b_par + 2.0):
+        return math.exp(log_front) * \
+            get_beta_fraction(a_par, b_par, x_val) / a_par
+    return 1.0 - math.exp(log_front) * \
+        get_beta_fraction(b_par, a_par, 1.0 - x_val) / b_par
+
+
+def get_student_t_cdf(t_val, dof):
+    '''
+    Cumulative distribution function of Student's t distribution
+    '''
+    tail = 0.5 * get_incomplete_beta(dof / 2.0, 0.5,
+                                     dof / (dof + t_val * t_val))
+    if t_val >= 0:
+        return 1.0 - tail
+    return tail
+
+
+# Cache of Student's t quantiles by (probability, degrees of freedom)
+T_QUANTILE_DICT = {}
+
+
+def get_student_t_quantile(prob, dof):
+    '''
+    Quantile of Student's t distribution (for prob >= 0.5)
+    '''
+    if (prob, dof) not in T_QUANTILE_DICT:
+        # Bisection over the cumulative distribution function
+        lower = 0.0
+        upper = 1.0
+        while get_student_t_cdf(upper, dof) < prob:
+            upper *= 2
+        for _ in range(100):
+            middle = (lower + upper) / 2.0
+            if get_student_t_cdf(middle, dof) < prob:
+                lower = middle
+            else:
+                upper = middle
+        T_QUANTILE_DICT[(prob, dof)] = (lower + upper) / 2.0
+    return T_QUANTILE_DICT[(prob, dof)]
+
+
+def get_mean_std(sample_list):
+    '''
+    Get mean and (sample) standard deviation of a list of values
+    '''
+    count = len(sample_list)
+    mean = math.fsum(sample_list) / count
+    if count < 2:
+        return (mean, float('NaN'))
+    variance = math.fsum((value - mean) ** 2 for value in sample_list) / \
+        (count - 1)
+    return (mean, math.sqrt(variance))
+
+
+def get_confidence_interval(sample_list, bootstrap=0, rand=None):
+    '''
+    Get mean, standard deviation and half-width of confidence interval
+    (with level CONFIDENCE) for a list of values. NaN values (missing
+    results) are ignored. If bootstrap > 0, the interval is a bootstrap
+    percentile interval with bootstrap resamples (half of its width is
+    returned)
+    '''
+    sample_list = [value for value in sample_list if not math.isnan(value)]
+    if not sample_list:
+        return (float('NaN'), float('NaN'), float('NaN'))
+    mean, std = get_mean_std(sample_list)
+    count = len(sample_list)
+    if count < 2:
+        return (mean, std, float('NaN'))
+    alpha = 1.0 - CONFIDENCE
+    if bootstrap > 0:
+        if rand is None:
+            rand = random.Random(SEED)
+        mean_list = sorted(math.fsum(rand.choice(sample_list)
+                                     for _ in xrange(count)) / count
+                           for _ in xrange(bootstrap))
+        lower = mean_list[int(alpha / 2 * (bootstrap - 1))]
+        upper = mean_list[int((1 - alpha / 2) * (bootstrap - 1))]
+        return (mean, std, (upper - lower) / 2.0)
+    quantile = get_student_t_quantile(1 - alpha / 2, count - 1)
+    return (mean, std, quantile * std / math.sqrt(count))
+
+
+def confidence_interval(key, in_file, out_file, bootstrap=0):
+    '''
+    Calculate final result with confidence interval.
+    For every value of key, each field of input file is replaced by its
+    mean, the field with suffix STD_SUFFIX by its standard deviation and
+    the field with suffix CI_SUFFIX by its confidence interval
+    '''
+    if not os.path.isfile(in_file):
+        print 'File does not exists: ' + in_file
+        return
+    # Group samples of each field by key value (in file order)
+    sample_dict = OrderedDict()
+    summary_file = open(in_file, 'r')
+    reader = csv.DictReader(summary_file, skipinitialspace=True)
+    for rec in reader:
+        field_dict = sample_dict.setdefault(rec[key], {})
+        for field, value in rec.items():
+            if field != key:
+                field_dict.setdefault(field, []).append(float(value))
+    summary_file.close()
+    rand = random.Random(SEED)
+    result_list = []
+    for key_value, field_dict in sample_dict.items():
+        result = {key: key_value}
+        for field, sample_list in field_dict.items():
+            mean, std, half_width = \
+                get_confidence_interval(sample_list, bootstrap, rand)
+            result[field] = mean
+            result[field + STD_SUFFIX] = std
+            result[field + CI_SUFFIX] = half_width
+        result_list.append(result)
+    write_file(out_file, key, result_list)
+
+
+def confidence_interval_all(plan, bootstrap=BOOTSTRAP_SAMPLES,
+                            filter_dict=None, suffix=''):
+    '''
+    Calculate confidence interval for all results (only summaries of
+    experiments matching filter_dict, in files with suffix)
+    '''
+    if filter_dict is None:
+        filter_dict = {}
+    # Result directories (steady state and resources) may be missing on
+    # trees generated by older versions
+    create_directories()
+    # Summary files of the plan (without repetitions)
+    name_list = []
+    for key, _, def_rec in filter_summaries(get_summary_list(plan),
+                                            filter_dict):
+        if (key, get_basename(key, def_rec) + suffix) not in name_list:
+            name_list.append((key, get_basename(key, def_rec) + suffix))
+    for key, basename in name_list:
+        in_file = RUNTIME_SUMMARY_DIR + os.sep + basename + '.csv'
+        out_file = RUNTIME_RESULT_DIR + os.sep + basename + '.csv'
+        confidence_interval(key, in_file, out_file, bootstrap)
+        in_file = MEMORY_SUMMARY_DIR + os.sep + basename + '.csv'
+        out_file = MEMORY_RESULT_DIR + os.sep + basename + '.csv'
+        confidence_interval(key, in_file, out_file, bootstrap)
+        # Steady state and resources (only summarized if there are
+        # iterations and resource files)
+        for summary_dir, result_dir in [(STEADY_SUMMARY_DIR,
+                                         STEADY_RESULT_DIR),
+                                        (WALL_SUMMARY_DIR, WALL_RESULT_DIR),
+                                        (RSS_SUMMARY_DIR, RSS_RESULT_DIR)]:
+            in_file = summary_dir + os.sep + basename + '.csv'
+            out_file = result_dir + os.sep + basename + '.csv'
+            if os.path.isfile(in_file):
+                confidence_interval(key, in_file, out_file, bootstrap)
+    if not match_filters(plan[PLAN_DEFAULT], filter_dict):
+        return
+    # Iterations
+    basename = 'iterations' + suffix + '.csv'
+    in_file = RUNTIME_SUMMARY_DIR + os.sep + basename
+    out_file = RUNTIME_RESULT_DIR + os.sep + basename
+    confidence_interval(ALGORITHM, in_file, out_file, bootstrap)
+    in_file = MEMORY_SUMMARY_DIR + os.sep + basename
+    out_file = MEMORY_RESULT_DIR + os.sep + basename
+    confidence_interval(ALGORITHM, in_file, out_file, bootstrap)
+
+
+def write_file(fname, id_field, record_list):
+    '''
+    Write record_list to file
+    '''
+    # Check if list of records is not empty
+    if len(record_list):
+        # Build field list without identifier field
+        field_list = [field for field in record_list[0].keys()
+                      if field != id_field]
+        # Sort field list
+        field_list.sort()
+        # Insert identifier field in the beginning of the list
+        field_list.insert(0, id_field)
+        output_file = open(fname, 'w')
+        writer = csv.DictWriter(output_file, field_list,
+                                delimiter=',')
+        header = {field: field for field in field_list}
+        writer.writerow(header)
+        for rec in record_list:
+            writer.writerow(rec)
+        output_file.close()
+
+
+def get_best_time(function, *args):
+    '''
+    Get best elapsed time of BENCH_REPEAT calls of a function
+    '''
+    time_list = []
+    for _ in range(BENCH_REPEAT):
+        start = time.time()
+        function(*args)
+        time_list.append(time.time() - start)
+    return min(time_list)
+
+
+def get_bench_conf(att_number, tup_number):
+    '''
+    Get experiment configuration of a benchmark (default parameters)
+    '''
+    exp_conf = get_default_plan()[PLAN_DEFAULT]
+    exp_conf.update({ATT: att_number, TUP: tup_number})
+    return exp_conf
+
+
+def bench_insert(att_number, tup_number, instants):
+    '''
+    Benchmark generation of inserted tuples.
+    Return (tuples number, elapsed time)
+    '''
+    def gen_all():
+        '''
+        Generate tuples of all instants
+        '''
+        for _ in xrange(instants):
+            get_rows(gen_insert_records(tup_number, att_number), att_number)
+    return (tup_number * instants, get_best_time(gen_all))
+
+
+def bench_delete(att_number, tup_number, instants):
+    '''
+    Benchmark sampling of deleted tuples (half of the live tuples at every
+    instant). Return (tuples number, elapsed time)
+    '''
+    matrix = gen_insert_records(tup_number, att_number)
+
+    def delete_all():
+        '''
+        Delete tuples of all instants
+        '''
+        live_set = LiveSet(att_number)
+        live_set.extend(matrix)
+        for _ in xrange(instants):
+            live_set.delete(tup_number / 2)
+            live_set.extend(matrix[:tup_number / 2 * att_number]
+                            if numpy is None else matrix[:tup_number / 2])
+    return (tup_number / 2 * instants, get_best_time(delete_all))
+
+
+def bench_store(att_number, tup_number, instants, table_format):
+    '''
+    Benchmark storage of a table in a format.
+    Return (rows number, elapsed time)
+    '''
+    batch_list = list(gen_table_batches(get_bench_conf(att_number,
+                                                       tup_number),
+                                        instants))
+    out_dir = tempfile.mkdtemp()
+    filename = out_dir + os.sep + 'bench.' + table_format
+    try:
+        elapsed = get_best_time(store_table, filename, att_number,
+                                batch_list)
+    finally:
+        shutil.rmtree(out_dir)
+    return (sum(len(batch[2]) for batch in batch_list), elapsed)
+
+
+def bench_rules(rule_number):
+    '''
+    Benchmark generation of rules. Return (rules number, elapsed time)
+    '''
+    exp_conf = get_default_plan()[PLAN_DEFAULT]
+    exp_conf[RUL] = rule_number
+    return (rule_number, get_best_time(gen_rules, exp_conf))
+
+
+def bench_summary(instants):
+    '''
+    Benchmark loading of detail files into a results database and
+    summary queries. Return (iterations number, elapsed time)
+    '''
+    out_dir = tempfile.mkdtemp()
+    rand = random.Random(SEED)
+    exp_id = get_experiment_id(get_default_plan()[PLAN_DEFAULT])
+    file_list = []
+    for count in range(BENCH_DETAIL_FILES):
+        filename = out_dir + os.sep + ALGORITHM_LIST[0] + '-' + exp_id + \
+            '.' + str(count + 1) + '.csv'
+        out_file = open(filename, 'w')
+        out_file.write('timestamp,runtime,memory\n')
+        for iteration in range(instants):
+            out_file.write(str(iteration) + ',' + str(rand.random()) + ',' +
+                           str(rand.randint(1, 1000)) + '\n')
+        out_file.close()
+        file_list.append(filename)
+
+    def summarize():
+        '''
+        Load detail files and run summary queries
+        '''
+        connection = open_results_db(':memory:')
+        for filename in file_list:
+            load_detail_file(connection, filename)
+        get_summary_dict(connection)
+        get_others_dict(connection)
+        get_steady_dict(connection)
+        connection.close()
+    try:
+        elapsed = get_best_time(summarize)
+    finally:
+        shutil.rmtree(out_dir)
+    return (BENCH_DETAIL_FILES * instants, elapsed)
+
+
+def get_bench_cases(size):
+    '''
+    Get benchmark cases of a size as tuples (name, unit, function, args)
+    '''
+    size_dict = BENCH_SIZE_DICT[size]
+    instants = size_dict['instants']
+    case_list = []
+    for att_number in size_dict[ATT]:
+        for tup_number in size_dict[TUP]:
+            suffix = ATT + str(att_number) + TUP + str(tup_number)
+            case_list.append(('insert/' + suffix, 'tuples/s', bench_insert,
+                              (att_number, tup_number, instants)))
+            case_list.append(('delete/' + suffix, 'tuples/s', bench_delete,
+                              (att_number, tup_number, instants)))
+            for table_format in [CSV, BINARY]:
+                case_list.append(('store_' + table_format + '/' + suffix,
+                                  'rows/s', bench_store,
+                                  (att_number, tup_number, instants,
+                                   table_format)))
+    for rule_number in size_dict[RUL]:
+        case_list.append(('rules/' + RUL + str(rule_number), 'rules/s',
+                          bench_rules, (rule_number,)))
+    case_list.append(('summary/iterations' + str(instants), 'rows/s',
+                      bench_summary, (instants,)))
+    return case_list
+
+
+def run_bench_case(case):
+    '''
+    Run a benchmark case (in its own process, so peak memory is measured
+    per case). Return (name, result dictionary)
+    '''
+    name, unit, function, args = case
+    set_seed(SEED)
+    count, elapsed = function(*args)
+    return (name, {'seconds': elapsed, 'count': count, 'unit': unit,
+                   'rate': count / max(elapsed, 1e-9),
+                   'peak_rss': resource.getrusage(
+                       resource.RUSAGE_SELF).ru_maxrss})
+
+
+def run_benchmarks(size=BENCH_SIZE, filename=BENCH_FILE):
+    '''
+    Run benchmark suite and store results (JSON)
+    '''
+    result_dict = OrderedDict()
+    pool = multiprocessing.Pool(1, maxtasksperchild=1)
+    try:
+        for name, result in pool.imap(run_bench_case, get_bench_cases(size)):
+            print name + ': ' + str(round(result['rate'], 1)) + ' ' + \
+                result['unit'] + ' (' + str(round(result['seconds'], 4)) + \
+                's, peak ' + str(result['peak_rss']) + ' kB)'
+            result_dict[name] = result
+    finally:
+        pool.terminate()
+    bench = {'version': GENERATOR_VERSION, 'size': size,
+             'python': sys.version.split()[0], 'numpy': numpy is not None,
+             'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+             'results': result_dict}
+    out_file = open(filename, 'w')
+    json.dump(bench, out_file, indent=2)
+    out_file.close()
+    print 'Benchmark results stored in ' + filename
+    return bench
+
+
+def compare_benchmarks(baseline_file, current_file=BENCH_FILE,
+                       threshold=BENCH_THRESHOLD):
+    '''
+    Compare benchmark results against a baseline. Cases whose rate
+    decreased more than threshold are flagged as slowdowns.
+    Return number of slowdowns
+    '''
+    bench_list = []
+    for filename in [baseline_file, current_file]:
+        in_file = open(filename, 'r')
+        bench_list.append(json.load(in_file, object_pairs_hook=OrderedDict))
+        in_file.close()
+    baseline, current = [bench['results'] for bench in bench_list]
+    slow_count = 0
+    for name, result in current.items():
+        if name not in baseline:
+            print name + ': not in baseline'
+            continue
+        ratio = result['rate'] / max(baseline[name]['rate'], 1e-9)
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = ' SLOWDOWN'
+            slow_count += 1
+        print name + ': ' + str(round(ratio, 2)) + 'x baseline rate' + flag
+    if slow_count:
+        print str(slow_count) + ' slowdowns (threshold ' + \
+            str(threshold) + ')'
+    else:
+        print 'No slowdowns'
+    return slow_count
+
+
+def get_arguments(print_help=False):
+    '''
+    Get arguments
+    '''
+    import argparse
+    parser = argparse.ArgumentParser(os.path.basename(__file__))
+    parser.add_argument('-g', '--gen', action="store_true",
+                        default=False,
+                        help='Generate files')
+    parser.add_argument('-r', '--run', action="store_true",
+                        default=False,
+                        help='Run experiments')
+    parser.add_argument('--sample-interval', type=float,
+                        default=SAMPLE_INTERVAL,
+                        help='Interval (in seconds) between samples of '
+                        'memory of running experiments')
+    parser.add_argument('--target-ci', type=float, default=TARGET_CI,
+                        metavar='FRACTION',
+                        help='Run experiments until the confidence interval '
+                        'half-width is at most FRACTION of the mean '
+                        '(adaptive repetition)')
+    parser.add_argument('--min-runs', type=int, default=MIN_RUNS,
+                        help='Minimum number of runs (adaptive repetition)')
+    parser.add_argument('--max-runs', type=int, default=MAX_RUNS,
+                        help='Maximum number of runs (adaptive repetition)')
+    parser.add_argument('--timeout', type=float, default=RUN_TIMEOUT,
+                        metavar='SECONDS',
+                        help='Wall-clock limit of each run (0 for no limit)')
+    parser.add_argument('--memory-limit', type=int, default=MEMORY_LIMIT,
+                        metavar='MB',
+                        help='Resident memory limit of each run '
+                        '(0 for no limit)')
+    parser.add_argument('--attempts', type=int, default=MAX_ATTEMPTS,
+                        help='Maximum number of attempts of each run')
+    parser.add_argument('--reset-failures', action="store_true",
+                        default=False,
+                        help='Forget failed attempts of the journal '
+                        '(with -r or --coordinator)')
+    parser.add_argument('--coordinator', type=int, metavar='PORT',
+                        help='Publish experiment runs to workers on PORT')
+    parser.add_argument('--worker', metavar='HOST:PORT',
+                        help='Run experiments leased from coordinator '
+                        'HOST:PORT')
+    parser.add_argument('-m', '--monitor', action="store_true",
+                        default=False,
+                        help='Monitor running experiments')
+    parser.add_argument('-s', '--summarize', action="store_true",
+                        default=False,
+                        help='Summarize results')
+    parser.add_argument('-c', '--config',
+                        default=None,
+                        help='Experiment plan file (JSON)')
+    parser.add_argument('--only', action='append', default=[],
+                        metavar='KEY=VALUE[,VALUE...]',
+                        help='Only experiments with these parameter values '
+                        '(may be repeated)')
+    parser.add_argument('--alg', action='append', choices=ALGORITHM_LIST,
+                        default=None,
+                        help='Only this algorithm (may be repeated)')
+    parser.add_argument('--runs', type=int, default=None,
+                        help='Number of runs of each experiment (default: ' +
+                        str(RUN_COUNT) + '; summaries use at most RUNS runs)')
+    parser.add_argument('--plan', action='store_true', default=False,
+                        help='List pending work and estimate its cost '
+                        '(dry run)')
+    parser.add_argument('-b', '--bootstrap', type=int,
+                        default=BOOTSTRAP_SAMPLES,
+                        help='Number of bootstrap resamples for confidence '
+                        'intervals (0 for Student\'s t intervals)')
+    parser.add_argument('-f', '--format', choices=FORMAT_LIST,
+                        default=TABLE_FORMAT,
+                        help='Format of generated tables')
+    parser.add_argument('--spill', metavar='DIR', default=SPILL_DIR,
+                        help='Spill live tuples to memory-mapped files in '
+                        'DIR while generating tables (requires NumPy)')
+    parser.add_argument('--convert', nargs=2, metavar=('IN', 'OUT'),
+                        default=None,
+                        help='Convert table IN to table OUT (formats '
+                        'according to file extensions)')
+    parser.add_argument('--derived', action="store_true",
+                        default=False,
+                        help='Derive tables from one base stream per shape '
+                        '(deletions and insertions)')
+    parser.add_argument('--serve', metavar='TARGET',
+                        help='Stream the table of the default experiment to '
+                        'TARGET (fifo:PATH, unix:PATH or tcp:PORT)')
+    parser.add_argument('--rate', type=float, default=SERVE_RATE,
+                        help='Tuples per second sent by --serve '
+                        '(0 for no limit)')
+    parser.add_argument('--instants', type=int, default=0,
+                        help='Number of instants sent by --serve '
+                        '(0 for no limit)')
+    parser.add_argument('--oracle', action="store_true",
+                        default=False,
+                        help='Evaluate queries with the reference evaluator')
+    parser.add_argument('--diff', nargs=2, metavar=('EXPECTED', 'ACTUAL'),
+                        help='Compare answers of two files '
+                        '(e.g. oracle and StreamPref output)')
+    parser.add_argument('--bench', nargs='?', const=BENCH_SIZE,
+                        choices=sorted(BENCH_SIZE_DICT), metavar='SIZE',
+                        help='Run benchmarks of PrefGen (sizes: ' +
+                        ', '.join(sorted(BENCH_SIZE_DICT)) + ')')
+    parser.add_argument('--bench-file', default=BENCH_FILE,
+                        help='File of benchmark results (JSON)')
+    parser.add_argument('--bench-compare', metavar='BASELINE',
+                        help='Compare benchmark results against BASELINE')
+    parser.add_argument('-j', '--jobs', type=int,
+                        default=1,
+                        help='Number of parallel processes '
+                        '(generation and experiment runs)')
+    args = parser.parse_args()
+    if print_help:
+        parser.print_help()
+    return args
+
+
+def main():
+    '''
+    Main routine
+    '''
+    global TABLE_FORMAT, SPILL_DIR  # IGNORE:global-statement
+    args = get_arguments()
+    TABLE_FORMAT = args.format
+    SPILL_DIR = args.spill
+    if SPILL_DIR is not None and numpy is None:
+        print 'Spilling live tuples requires NumPy (kept in memory)'
+        SPILL_DIR = None
+    plan = get_plan(args.config)
+    filter_dict = parse_filters(args.only)
+    all_exp_list = gen_experiment_list(plan)
+    exp_list = filter_experiments(all_exp_list, filter_dict)
+    if filter_dict:
+        print 'Selected ' + str(len(exp_list)) + ' of ' + \
+            str(len(all_exp_list)) + ' experiments'
+    alg_list = ALGORITHM_LIST
+    if args.alg:
+        alg_list = [alg for alg in ALGORITHM_LIST if alg in args.alg]
+    run_count = RUN_COUNT
+    if args.runs is not None:
+        run_count = args.runs
+    if args.convert:
+        print 'Converting ' + args.convert[0] + ' to ' + args.convert[1]
+        convert_table(args.convert[0], args.convert[1])
+    elif args.plan:
+        plan_experiments(exp_list, all_exp_list, args.jobs, args.target_ci,
+                         args.max_runs, alg_list, run_count)
+    elif args.gen:
+        create_directories()
+        manifest = load_manifest()
+        print 'Generating table data'
+        gen_all_tables(exp_list, args.jobs, manifest, args.derived)
+        store_manifest(manifest)
         print 'Generating queries'
-        gen_all_queries(exp_list)
+        gen_all_queries(exp_list, args.jobs, manifest)
+        store_manifest(manifest)
         print 'Generating environments'
-        gen_all_env_files(exp_list)
+        gen_all_env_files(exp_list, args.jobs, manifest)
+        store_manifest(manifest)
+    elif args.bench or args.bench_compare:
+        if args.bench:
+            create_directories()
+            run_benchmarks(args.bench, args.bench_file)
+        if args.bench_compare and \
+                compare_benchmarks(args.bench_compare, args.bench_file):
+            sys.exit(1)
+    elif args.diff:
+        if diff_answers(args.diff[0], args.diff[1]):
+            sys.exit(1)
+    elif args.oracle:
+        print 'Evaluating queries with reference evaluator'
+        create_directories()
+        evaluate_oracle_all(exp_list, args.jobs)
+    elif args.serve:
+        serve_stream(plan[PLAN_DEFAULT], args.serve, args.rate,
+                     args.instants)
+    elif args.coordinator is not None:
+        create_directories()
+        if args.reset_failures:
+            append_journal(RUN_RESET)
+        run_coordinator(exp_list, args.coordinator, args.attempts,
+                        alg_list, run_count)
+    elif args.worker:
+        create_directories()
+        host, port = args.worker.rsplit(':', 1)
+        run_worker((host, int(port)), all_exp_list, args.sample_interval,
+                   args.timeout, args.memory_limit, args.derived)
     elif args.run:
         print 'Running experiments'
-        run_experiments(exp_list)
+        if args.reset_failures:
+            append_journal(RUN_RESET)
+        run_experiments(exp_list, args.jobs, args.sample_interval,
+                        args.target_ci, args.min_runs, args.max_runs,
+                        (args.timeout, args.memory_limit, args.attempts),
+                        alg_list, run_count)
+    elif args.monitor:
+        print 'Monitoring experiments'
+        monitor_experiments(exp_list, alg_list, run_count, args.attempts,
+                            (args.target_ci, args.min_runs, args.max_runs))
     elif args.summarize:
-        print 'Summarizing results'
-        summarize_all()
+        suffix = get_selection_suffix(filter_dict, alg_list, args.runs)
+        if suffix:
+            print 'Summarizing selected results (files *' + suffix + ')'
+        else:
+            print 'Summarizing results'
+        summarize_all(plan, filter_dict, alg_list, args.runs)
         print 'Calculating confidence intervals'
-        confidence_interval_all()
+        confidence_interval_all(plan, args.bootstrap, filter_dict, suffix)
     else:
         get_arguments(True)
 